@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""assets.py: process wide cache for images, fonts and rendered text"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import threading
+from collections import OrderedDict
+
+import pygame
+
+
+# --- classes ---
+class AssetManager:
+    """
+    purpose: load each image, font and text render once and hand out shared copies, evicting least recently used ones
+    surfaces returned are shared, draw them but don't draw onto them
+    """
+    def __init__(self,
+                 max_image_bytes: int = 64 * 1024 * 1024,
+                 max_fonts: int = 16,
+                 max_texts: int = 256):
+        # attr from params
+        self.max_image_bytes = max_image_bytes
+        self.max_fonts = max_fonts
+        self.max_texts = max_texts
+
+        # caches in least to most recently used order
+        self.images = OrderedDict()  # (path, size, rotation) -> pygame.Surface
+        self.image_bytes = 0
+        self.fonts = OrderedDict()  # (path, size) -> pygame.font.Font
+        self.texts = OrderedDict()  # (path, size, text, color, background) -> pygame.Surface
+
+        # image files being decoded on a background thread, path -> (threading.Event, [pygame.Surface])
+        self.preloading = {}
+
+    def get_image(self, path: str,
+                  size=None,
+                  rotation: int = 0) -> pygame.Surface:
+        """
+        purpose: get an image scaled to size and rotated by rotation degrees
+        :param size: (width, height) in pixels, None keeps the file size
+        """
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (path, size, rotation % 360)
+
+        # cache hit, mark as most recently used
+        image = self.images.get(key)
+        if image is not None:
+            self.images.move_to_end(key)
+            return image
+
+        # build from the unrotated or unscaled version so each step is cached too
+        if rotation % 360:
+            image = pygame.transform.rotate(self.get_image(path, size), rotation)
+        elif size is not None:
+            image = pygame.transform.scale(self.get_image(path), size)
+        else:
+            image = self.take_preloaded(path)
+            if image is None:
+                image = pygame.image.load(path)
+            # match display pixel format for fast blits once a display exists
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+
+        self.add_image(key, image)
+        return image
+
+    def preload(self, paths) -> None:
+        """
+        purpose: start decoding image files on a background thread, get_image waits for any still loading
+        decoding happens outside the GIL, so the main thread can draw in the meantime
+        """
+        paths = [path for path in paths if (path, None, 0) not in self.images and path not in self.preloading]
+        jobs = [(path, threading.Event(), []) for path in paths]
+        for path, done, result in jobs:
+            self.preloading[path] = (done, result)
+
+        def load_files():
+            for path, done, result in jobs:
+                try:
+                    result.append(pygame.image.load(path))
+                except (pygame.error, OSError):
+                    pass  # loaded again on the main thread by get_image, which raises the error there
+                done.set()
+
+        threading.Thread(target=load_files, daemon=True).start()
+
+    def take_preloaded(self, path: str):
+        """
+        purpose: get an image decoded by preload, waiting for it if it is still loading
+        :return image: decoded image, None if it wasn't preloaded or failed to load
+        """
+        job = self.preloading.pop(path, None)
+        if job is None:
+            return None
+        done, result = job
+        done.wait()
+        return result[0] if result else None
+
+    def add_image(self, key: tuple, image: pygame.Surface) -> None:
+        """
+        purpose: cache an image, evicting the least recently used ones to stay in the memory budget
+        """
+        self.images[key] = image
+        self.image_bytes += self.get_image_bytes(image)
+        while self.image_bytes > self.max_image_bytes and len(self.images) > 1:
+            _, evicted_image = self.images.popitem(last=False)
+            self.image_bytes -= self.get_image_bytes(evicted_image)
+
+    @staticmethod
+    def get_image_bytes(image: pygame.Surface) -> int:
+        """
+        purpose: get pixel memory used by an image
+        """
+        return image.get_width() * image.get_height() * image.get_bytesize()
+
+    def get_font(self, path, size: int) -> pygame.font.Font:
+        """
+        purpose: get a font, path None uses the pygame default font
+        """
+        key = (path, int(size))
+        font = self.fonts.get(key)
+        if font is not None:
+            self.fonts.move_to_end(key)
+            return font
+
+        font = pygame.font.Font(path, int(size))
+        self.fonts[key] = font
+        if len(self.fonts) > self.max_fonts:
+            self.fonts.popitem(last=False)
+        return font
+
+    def get_text(self, path,
+                 size: int,
+                 text: str,
+                 color: tuple,
+                 background: tuple = None) -> pygame.Surface:
+        """
+        purpose: get antialiased text rendered in a font, only rendering text not seen recently
+        :param background: solid color behind the text, None for transparent
+        """
+        key = (path, int(size), text, color, background)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            return surface
+
+        surface = self.get_font(path, size).render(text, True, color, background)
+        self.texts[key] = surface
+        if len(self.texts) > self.max_texts:
+            self.texts.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        """
+        purpose: drop every cached asset, e.g. after switching skins
+        """
+        self.images.clear()
+        self.image_bytes = 0
+        self.fonts.clear()
+        self.texts.clear()
+
+
+# shared by every panel and sprite in the process
+asset_manager = AssetManager()
+
+
+# --- test ---
+if __name__ == "__main__":
+    pygame.init()
+    screen = pygame.display.set_mode((200, 200))
+    head = asset_manager.get_image('./img/snake1/head.png', (50, 50), -90)
+    print(f'same surface: {head is asset_manager.get_image("./img/snake1/head.png", (50, 50), -90)}')
+    print(f'{len(asset_manager.images)} images cached, {asset_manager.image_bytes} bytes')
+    pygame.quit()
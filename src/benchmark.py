@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""benchmark.py: time engine and rendering hot paths and compare against a baseline"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+from src.engine.autopilot import get_hamiltonian_cycle
+from src.engine.engine import SnakeEngine
+from src.engine.free_tiles import FreeTiles
+
+
+# --- funcs ---
+def set_snake(engine: SnakeEngine, snake_length: int) -> dict:
+    """
+    purpose: lay a snake of snake_length along a hamiltonian cycle and respawn the fruit around it
+    odd boards have no cycle over every tile, the cycle covers all but their last row and column instead
+    :return next_directions: cell -> direction that keeps the snake on the cycle forever
+    """
+    cycle = [engine.get_cell(x, y) for x, y in get_hamiltonian_cycle(engine.tile_count - engine.tile_count % 2)]
+    next_directions = {}
+    for cell, next_cell in zip(cycle, cycle[1:] + cycle[:1]):
+        x, y = engine.get_position(cell)
+        next_x, next_y = engine.get_position(next_cell)
+        next_directions[cell] = (next_x - x, next_y - y)
+
+    engine.reset()
+    engine.body = deque(reversed(cycle[:snake_length]))
+    engine.occupied = set(engine.body)
+    engine.direction = next_directions[engine.body[1]]
+    engine.grow = False
+    engine.free_tiles = FreeTiles(cell for cell in range(engine.tile_count ** 2) if cell not in engine.occupied)
+    for fruit_idx in range(len(engine.fruits)):
+        engine.fruits[fruit_idx] = engine.get_random_open_tile()
+        engine.free_tiles.remove(engine.fruits[fruit_idx])
+    return next_directions
+
+
+def measure(op,
+            duration: float,
+            max_iterations: int,
+            prepare=None) -> dict:
+    """
+    purpose: call op repeatedly, timing each call
+    :param prepare: untimed callable run before each call, e.g. to put state back
+    :return stats: iterations, ops_per_sec, p50_us, p99_us, alloc_peak_bytes and net_blocks_per_op
+    """
+    # warm up caches
+    for _ in range(10):
+        if prepare is not None:
+            prepare()
+        op()
+
+    # time each call
+    timings = []
+    end = time.perf_counter() + duration
+    while len(timings) < max_iterations and time.perf_counter() < end:
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter_ns()
+        op()
+        timings.append(time.perf_counter_ns() - start)
+
+    # count allocations on a separate pass, tracing slows every call down
+    allocation_iterations = min(len(timings), 1000)
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    for _ in range(allocation_iterations):
+        if prepare is not None:
+            prepare()
+        op()
+    _, alloc_peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks_after = sys.getallocatedblocks()
+
+    timings.sort()
+    return {'iterations': len(timings),
+            'ops_per_sec': len(timings) / (sum(timings) / 1e9),
+            'p50_us': timings[len(timings) // 2] / 1000,
+            'p99_us': timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1000,
+            'alloc_peak_bytes': alloc_peak_bytes,
+            'net_blocks_per_op': (blocks_after - blocks_before) / allocation_iterations}
+
+
+def bench_engine_step(tile_count: int, snake_length: int, fruit_count: int):
+    """
+    purpose: SnakeEngine.step, snake follows the hamiltonian cycle so it never dies
+    """
+    engine = SnakeEngine(tile_count, fruit_count, seed=0)
+    next_directions = set_snake(engine, snake_length)
+
+    def prepare():
+        # keep snake length near snake_length
+        if engine.done or len(engine.body) > snake_length * 2:
+            set_snake(engine, snake_length)
+
+    return lambda: engine.step(next_directions[engine.head]), prepare
+
+
+def bench_spawn_fruit(tile_count: int, snake_length: int, fruit_count: int):
+    """
+    purpose: SnakeEngine.spawn_fruit, the eaten fruit tile is handed back so the board never fills
+    """
+    engine = SnakeEngine(tile_count, fruit_count, seed=0)
+    set_snake(engine, snake_length)
+
+    def op():
+        engine.free_tiles.add(engine.fruits[0])
+        engine.spawn_fruit(0)
+
+    return op, None
+
+
+def bench_collision_check(tile_count: int, snake_length: int, fruit_count: int):
+    """
+    purpose: self collision lookup of the tail tile, the worst case for a list scan
+    """
+    engine = SnakeEngine(tile_count, fruit_count, seed=0)
+    set_snake(engine, snake_length)
+    tail = engine.body[-1]
+    return lambda: tail in engine.occupied, None
+
+
+def bench_snake_draw(game, snake_length: int):
+    """
+    purpose: Snake.draw of the whole snake
+    """
+    return lambda: game.snake.draw(game.board.surface), None
+
+
+def bench_snake_draw_cells(game, snake_length: int):
+    """
+    purpose: Snake.draw_cells of the cells a dirty frame redraws
+    """
+    cells = game.get_dirty_cells()
+    return lambda: game.snake.draw_cells(game.board.surface, cells), None
+
+
+def bench_board_draw(game, snake_length: int):
+    """
+    purpose: Board.draw
+    """
+    return game.board.draw, None
+
+
+def bench_fruit_pulse(game, snake_length: int):
+    """
+    purpose: Fruit.update of every fruit
+    """
+    return lambda: game.fruits.update(game.board.tile_size), None
+
+
+def bench_frame(game, snake_length: int):
+    """
+    purpose: SnakeGame.draw_scene with the snake slithering between moves
+    """
+    progress = itertools.cycle(step_idx / 10 for step_idx in range(10))
+
+    def prepare():
+        game.snake.interpolate(next(progress))
+
+    return game.draw_scene, prepare
+
+
+# benchmark name -> (setup function, unit, whether it needs a rendered game)
+BENCHMARKS = {'engine_step': (bench_engine_step, 'ticks', False),
+              'spawn_fruit': (bench_spawn_fruit, 'spawns', False),
+              'collision_check': (bench_collision_check, 'checks', False),
+              'snake_draw': (bench_snake_draw, 'frames', True),
+              'snake_draw_cells': (bench_snake_draw_cells, 'frames', True),
+              'board_draw': (bench_board_draw, 'frames', True),
+              'fruit_pulse': (bench_fruit_pulse, 'frames', True),
+              'frame': (bench_frame, 'frames', True)}
+
+
+def make_game(tile_count: int, snake_length: int, fruit_count: int):
+    """
+    purpose: build a SnakeGame on the offscreen SDL driver with a snake of snake_length
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from src.main import SnakeGame
+
+    game = SnakeGame(fruit_count=fruit_count, tile_count=tile_count)
+    game.load_sprites()
+    set_snake(game.engine, snake_length)
+    game.snake.sync()
+    game.sync_fruits()
+    game.full_redraw = True
+    game.draw_scene()
+    return game
+
+
+def run_benchmarks(names: list,
+                   tile_counts: list,
+                   snake_lengths: list,
+                   fruit_counts: list,
+                   duration: float,
+                   max_iterations: int) -> list:
+    """
+    purpose: run each benchmark over the matrix of board sizes, snake lengths and fruit counts
+    :return results: one dict per benchmark and matrix point
+    """
+    results = []
+    for tile_count, snake_length, fruit_count in itertools.product(tile_counts, snake_lengths, fruit_counts):
+        # snake can't be longer than half the board and still leave room for fruit
+        snake_length = min(snake_length, tile_count * tile_count // 2)
+        game = None
+        for name in names:
+            setup, unit, rendered = BENCHMARKS[name]
+            if rendered:
+                if game is None:
+                    game = make_game(tile_count, snake_length, fruit_count)
+                op, prepare = setup(game, snake_length)
+            else:
+                op, prepare = setup(tile_count, snake_length, fruit_count)
+
+            result = {'name': name,
+                      'unit': unit,
+                      'tile_count': tile_count,
+                      'snake_length': snake_length,
+                      'fruit_count': fruit_count}
+            result.update(measure(op, duration, max_iterations, prepare))
+            results.append(result)
+            print(f"{name:>16} tiles={tile_count:<4} length={snake_length:<6} fruits={fruit_count:<3} "
+                  f"{result['ops_per_sec']:>12.0f} {unit}/s  p50={result['p50_us']:.1f}us  "
+                  f"p99={result['p99_us']:.1f}us")
+    return results
+
+
+def get_result_key(result: dict) -> tuple:
+    """
+    purpose: identify a benchmark result across runs
+    """
+    return result['name'], result['tile_count'], result['snake_length'], result['fruit_count']
+
+
+def compare_to_baseline(results: list,
+                        baseline_results: list,
+                        tolerance: float) -> list:
+    """
+    purpose: find results slower than the baseline by more than tolerance
+    :param tolerance: allowed drop in ops_per_sec as a fraction, e.g. 0.2 for 20%
+    :return regressions: (result, baseline_result) pairs that got slower
+    """
+    baseline_by_key = {get_result_key(result): result for result in baseline_results}
+    regressions = []
+    for result in results:
+        baseline_result = baseline_by_key.get(get_result_key(result))
+        if baseline_result is not None and result['ops_per_sec'] < baseline_result['ops_per_sec'] * (1 - tolerance):
+            regressions.append((result, baseline_result))
+    return regressions
+
+
+# --- main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='benchmark snake engine and rendering hot paths')
+    parser.add_argument('--output', default='benchmark.json', help='JSON file to write results to')
+    parser.add_argument('--baseline', help='JSON results to compare against, exits 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown vs baseline, 0.2 = 20%%')
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument('--tile-counts', nargs='+', type=int, default=[16, 17, 64, 256])
+    parser.add_argument('--snake-lengths', nargs='+', type=int, default=[4, 64, 1024])
+    parser.add_argument('--fruit-counts', nargs='+', type=int, default=[1, 16])
+    parser.add_argument('--duration', type=float, default=0.2, help='seconds per benchmark')
+    parser.add_argument('--max-iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.benchmarks, args.tile_counts, args.snake_lengths, args.fruit_counts,
+                             args.duration, args.max_iterations)
+    pygame = sys.modules.get('pygame')  # only imported by rendering benchmarks
+    report = {'meta': {'python': platform.python_version(),
+                       'pygame': pygame.version.ver if pygame is not None else None,
+                       'platform': platform.platform(),
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+              'results': results}
+    with open(args.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f'wrote {len(results)} results to {args.output}')
+
+    # catch slowdowns
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline_results = json.load(baseline_file)['results']
+        regressions = compare_to_baseline(results, baseline_results, args.tolerance)
+        for result, baseline_result in regressions:
+            print(f"REGRESSION {result['name']} tiles={result['tile_count']} length={result['snake_length']} "
+                  f"fruits={result['fruit_count']}: {result['ops_per_sec']:.0f} vs "
+                  f"{baseline_result['ops_per_sec']:.0f} {result['unit']}/s")
+        if regressions:
+            sys.exit(1)
+        print('no regressions')
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""autopilot.py: bot that steers a SnakeEngine to fruit without trapping itself"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import time
+from collections import deque
+
+from src.engine.engine import SnakeEngine
+
+
+# --- funcs ---
+def get_hamiltonian_cycle(tile_count: int) -> list:
+    """
+    purpose: get a cycle of (x, y) tiles visiting the whole board, tile_count must be even
+    rows are swept back and forth over columns 1+, column 0 leads back to the top
+    odd boards have an odd number of tiles, which no cycle on a grid can visit
+    """
+    if tile_count < 2 or tile_count % 2:
+        raise ValueError(f'a hamiltonian cycle needs an even tile_count of at least 2, got {tile_count}')
+    cycle = []
+    for row_idx in range(tile_count):
+        columns = range(1, tile_count) if row_idx % 2 == 0 else range(tile_count - 1, 0, -1)
+        cycle.extend((column_idx, row_idx) for column_idx in columns)
+    cycle.extend((0, row_idx) for row_idx in range(tile_count - 1, -1, -1))
+    return cycle
+
+
+def autopilot_policy(engine: SnakeEngine, seed: int):
+    """
+    purpose: policy factory for rollouts, see rollout.load_policy_factory
+    searches are run to the end every step so results only depend on the seed
+    """
+    autopilot = Autopilot(engine, time_budget=None)
+
+    def policy(engine: SnakeEngine):
+        return autopilot.get_action()
+
+    return policy
+
+
+# --- classes ---
+class Autopilot:
+    """
+    purpose: pick the next direction for a snake, heading for the nearest fruit along a shortest path
+    the search spreads out from the fruit rather than the head, so a slow search can carry on over several
+    steps, it restarts when a fruit moves or when the body has since moved over the path it gives or off
+    the cells the head needs a distance for
+    a fruit is only chased if the head could still follow its tail both after the move and after eating,
+    otherwise it waits on the hamiltonian cycle on even boards or behind the tail, varying the loop it waits
+    on if no fruit opens up for a while, and only when every move can trap it takes the one with most room
+    """
+    def __init__(self, engine: SnakeEngine,
+                 time_budget=0.002,
+                 space_check_limit: int = 4096):
+        """
+        :param time_budget: seconds of search per step, None to always finish the search
+        :param space_check_limit: most tiles counted when checking a move leaves room for the snake
+        """
+        # attr from params
+        self.engine = engine
+        self.time_budget = time_budget
+        self.space_check_limit = space_check_limit
+
+        # neighbor lookups, cell id step -> direction
+        tile_count = engine.tile_count
+        self.cell_steps = {-tile_count: SnakeEngine.UP, 1: SnakeEngine.RIGHT,
+                           tile_count: SnakeEngine.DOWN, -1: SnakeEngine.LEFT}
+
+        # cell -> next cell on the hamiltonian cycle, only odd boards have none
+        self.cycle_next = {}
+        if tile_count % 2 == 0:
+            cycle = [engine.get_cell(x, y) for x, y in get_hamiltonian_cycle(tile_count)]
+            self.cycle_next = dict(zip(cycle, cycle[1:] + cycle[:1]))
+
+        # breadth first search out from the fruits, kept between steps
+        self.fruits = None  # fruit cells the search started from
+        self.distances = {}  # cell -> steps to the nearest fruit
+        self.frontier = deque()  # cells to expand next
+        self.searched = False  # True once the frontier is empty
+        self.last_meal_steps = engine.steps  # step the fruits last moved on
+
+        # cell -> cells next to it, looked up on every tile of every search and space check
+        self.neighbors = [self.find_neighbors(cell) for cell in range(tile_count * tile_count)]
+
+    def get_neighbors(self, cell: int) -> list:
+        """
+        purpose: get cells next to a cell, skipping off board ones
+        """
+        return self.neighbors[cell]
+
+    def find_neighbors(self, cell: int) -> list:
+        """
+        purpose: work out the cells next to a cell, skipping off board ones
+        """
+        tile_count = self.engine.tile_count
+        y, x = divmod(cell, tile_count)
+        neighbors = []
+        if y > 0:
+            neighbors.append(cell - tile_count)
+        if x < tile_count - 1:
+            neighbors.append(cell + 1)
+        if y < tile_count - 1:
+            neighbors.append(cell + tile_count)
+        if x > 0:
+            neighbors.append(cell - 1)
+        return neighbors
+
+    def restart_search(self) -> None:
+        """
+        purpose: start a new search from the current fruit cells
+        """
+        self.fruits = tuple(self.engine.fruits)
+        self.distances = {fruit: 0 for fruit in self.fruits}
+        self.frontier = deque(self.fruits)
+        self.searched = False
+
+    def search(self, deadline) -> None:
+        """
+        purpose: expand the search until it reaches the head, runs out of cells or time runs out
+        :param deadline: time.perf_counter() to stop at, None for no limit
+        """
+        occupied = self.engine.occupied
+        distances = self.distances
+        frontier = self.frontier
+        head_neighbors = self.get_neighbors(self.engine.head)
+        expanded = 0
+        while frontier:
+            # stop once every move of the head has a distance
+            if all(cell in distances or cell in occupied for cell in head_neighbors):
+                return
+            # checking the time is slow, do it every so often
+            expanded += 1
+            if deadline is not None and expanded % 256 == 0 and time.perf_counter() > deadline:
+                return
+            cell = frontier.popleft()
+            distance = distances[cell] + 1
+            for neighbor in self.get_neighbors(cell):
+                if neighbor not in distances and neighbor not in occupied:
+                    distances[neighbor] = distance
+                    frontier.append(neighbor)
+        self.searched = True
+
+    def get_action(self):
+        """
+        purpose: pick the direction for the next step
+        :return action: (x, y) direction, None to keep going when every move is fatal
+        """
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        engine = self.engine
+        if not engine.fruits:
+            return None
+        if tuple(engine.fruits) != self.fruits:
+            self.last_meal_steps = engine.steps
+            self.restart_search()
+        self.search(deadline)
+
+        # moves that don't hit a wall or the body
+        head = engine.head
+        moves = [cell for cell in self.get_neighbors(head) if cell not in engine.occupied]
+        if not moves:
+            return None
+
+        # the body moved since the search ran, redo it if it lost track of the head or runs through the body
+        distances = self.distances
+        reached = [cell for cell in moves if cell in distances]
+        if (self.searched and not reached) or (reached and not self.is_path_clear(min(reached, key=distances.get))):
+            self.restart_search()
+            self.search(deadline)
+            distances = self.distances
+            reached = [cell for cell in moves if cell in distances]
+
+        # closest move to a fruit that leaves the snake room to keep going
+        if self.searched or reached:
+            nearest = sorted((cell for cell in reached if self.is_path_clear(cell)), key=distances.get)
+        else:
+            # search still going, head straight for the nearest fruit until it reaches the head
+            fruit_positions = [engine.get_position(fruit) for fruit in engine.fruits]
+
+            def get_fruit_distance(cell):
+                x, y = engine.get_position(cell)
+                return min(abs(x - fruit_x) + abs(y - fruit_y) for fruit_x, fruit_y in fruit_positions)
+
+            nearest = sorted(moves, key=get_fruit_distance)
+        for cell in nearest:
+            if self.has_space(cell) and (cell not in distances or self.is_meal_safe(cell)):
+                return self.cell_steps[cell - head]
+
+        # no safe path to fruit, a wait that goes round the same loop twice may never open one,
+        # so switch between safe moves every few steps until a fruit is eaten
+        safe_moves = [cell for cell in moves if self.has_space(cell)]
+        if len(safe_moves) > 1 and engine.steps - self.last_meal_steps > 2 * engine.tile_count ** 2:
+            return self.cell_steps[safe_moves[engine.steps // 7 % len(safe_moves)] - head]
+
+        # coil along the hamiltonian cycle to wait for room
+        cycle_cell = self.cycle_next.get(head)
+        if cycle_cell in safe_moves:
+            return self.cell_steps[cycle_cell - head]
+
+        # stall behind the tail, taking the long way round so the body has time to clear
+        tail_x, tail_y = engine.get_position(engine.body[-1])
+
+        def get_tail_distance(cell):
+            x, y = engine.get_position(cell)
+            return abs(x - tail_x) + abs(y - tail_y)
+
+        if safe_moves:
+            return self.cell_steps[max(safe_moves, key=get_tail_distance) - head]
+
+        # every move can trap the snake, take the one leaving the most room
+        space_limit = min(2 * len(engine.body), self.space_check_limit)
+
+        def score_move(cell):
+            return self.count_space(cell, space_limit), -get_tail_distance(cell)
+
+        return self.cell_steps[max(moves, key=score_move) - head]
+
+    def is_path_clear(self, cell: int) -> bool:
+        """
+        purpose: check a path to the fruit still runs down the distances from cell without crossing the body
+        """
+        occupied = self.engine.occupied
+        distances = self.distances
+        distance = distances[cell]
+        while distance > 0:
+            for neighbor in self.get_neighbors(cell):
+                if distances.get(neighbor) == distance - 1 and neighbor not in occupied:
+                    cell = neighbor
+                    break
+            else:
+                return False
+            distance -= 1
+        return True
+
+    def has_space(self, cell: int) -> bool:
+        """
+        purpose: check the head could still follow its tail after moving to cell, so the move can't trap it
+        a space of space_check_limit tiles counts as safe too, which bounds the check on big boards
+        """
+        engine = self.engine
+        body = engine.body
+        # the tail stays put on a growing step, eating grows the snake on the step after
+        if engine.grow:
+            return self.reaches_tail(cell, engine.occupied, body[-1], 3 if cell in engine.fruits else 2)
+        return self.reaches_tail(cell, engine.occupied, body[-2], 3 if cell in engine.fruits else 2, freed=body[-1])
+
+    def is_meal_safe(self, cell: int) -> bool:
+        """
+        purpose: check the snake could still follow its tail after taking the path from cell to a fruit
+        plays the path out on a copy of the body, so it costs the length of the snake and the path
+        """
+        engine = self.engine
+        distances = self.distances
+        body = deque(engine.body)
+        occupied = set(engine.occupied)
+        grow = engine.grow
+        while True:
+            # move the copy's head onto cell
+            if grow:
+                grow = False
+            else:
+                occupied.discard(body.pop())
+            body.appendleft(cell)
+            occupied.add(cell)
+            distance = distances[cell]
+            if distance == 0:
+                break
+            for neighbor in self.get_neighbors(cell):
+                if distances.get(neighbor) == distance - 1 and neighbor not in occupied:
+                    cell = neighbor
+                    break
+            else:
+                return False
+        # snake grows on the next step, so its tail tile opens a step later
+        return self.reaches_tail(cell, occupied, body[-1], 3)
+
+    def reaches_tail(self, head: int,
+                     occupied: set,
+                     tail: int,
+                     tail_wait: int,
+                     freed: int = None) -> bool:
+        """
+        purpose: check a path leads from head to the tail without crossing the rest of the body
+        :param tail_wait: fewest steps before the head can move onto the tail tile
+        :param freed: tile in occupied the tail has already left
+        :return reachable: True if the tail can be reached or space_check_limit tiles are open
+        """
+        path_lengths = {head: 0}
+        frontier = [head]
+        while frontier and len(path_lengths) < self.space_check_limit:
+            current = frontier.pop()
+            path_length = path_lengths[current] + 1
+            for neighbor in self.get_neighbors(current):
+                if neighbor == tail and path_length >= tail_wait:
+                    return True
+                if neighbor not in path_lengths and (neighbor not in occupied or neighbor == freed):
+                    path_lengths[neighbor] = path_length
+                    frontier.append(neighbor)
+        return len(path_lengths) >= self.space_check_limit
+
+    def count_space(self, cell: int, limit: int = None) -> int:
+        """
+        purpose: count open tiles reachable from cell, up to limit
+        the tail counts as open since it moves on before the head can get there
+        """
+        limit = self.space_check_limit if limit is None else limit
+        occupied = self.engine.occupied
+        tail = self.engine.body[-1]
+        seen = {cell}
+        frontier = [cell]
+        while frontier and len(seen) < limit:
+            current = frontier.pop()
+            for neighbor in self.get_neighbors(current):
+                if neighbor not in seen and (neighbor not in occupied or neighbor == tail):
+                    seen.add(neighbor)
+                    frontier.append(neighbor)
+        return len(seen)
+
+
+# --- test ---
+if __name__ == "__main__":
+    import sys
+
+    # play autopilot games and report how long they last
+    tile_count = int(sys.argv[1]) if len(sys.argv) > 1 else 17
+    scores = []
+    start = time.perf_counter()
+    total_steps = 0
+    for seed in range(10):
+        engine = SnakeEngine(tile_count, fruit_count=1, seed=seed)
+        autopilot = Autopilot(engine)
+        while not engine.done and engine.steps < 100 * tile_count * tile_count:
+            engine.step(autopilot.get_action())
+        scores.append(engine.score)
+        total_steps += engine.steps
+    elapsed = time.perf_counter() - start
+    print(f'scores {scores} on {tile_count}x{tile_count}, mean length {sum(scores) / len(scores) + 3:.0f} '
+          f'of {tile_count * tile_count} tiles, {total_steps / elapsed:.0f} steps/s')
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""batch_engine.py: many headless snake games stepped together on numpy arrays"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+from random import Random
+
+import numpy as np
+
+from src.engine.engine import SnakeEngine, get_starting_body
+from src.engine.free_tiles import FreeTiles
+
+
+# --- classes ---
+class BatchSnakeEngine:
+    """
+    purpose: step game_count snake games in lockstep with the same rules as SnakeEngine
+    game idx plays exactly like SnakeEngine(tile_count, fruit_count, seed + idx), finished games reset themselves
+    actions are direction indices into SnakeEngine.DIRECTIONS, -1 keeps the current direction
+    """
+    # loss causes
+    NOT_LOST = 0
+    WALL = 1
+    COLLISION = 2
+    LOSS_CAUSES = (None, 'wall', 'collision')  # loss cause code -> SnakeEngine.loss_cause
+
+    def __init__(self,
+                 game_count: int,
+                 tile_count: int,
+                 fruit_count: int,
+                 seed: int = 0):
+        # attr from params
+        self.game_count = game_count
+        self.tile_count = tile_count
+        self.fruit_count = fruit_count
+        self.seed = seed
+        cell_count = tile_count * tile_count
+        self.cell_count = cell_count
+
+        # fruit spawns draw from one python Random per game so games match SnakeEngine exactly
+        self.randoms = [Random(seed + game_idx) for game_idx in range(game_count)]
+
+        # direction index -> tile offsets
+        self.direction_x = np.array([direction[0] for direction in SnakeEngine.DIRECTIONS], dtype=np.int64)
+        self.direction_y = np.array([direction[1] for direction in SnakeEngine.DIRECTIONS], dtype=np.int64)
+        self.games = np.arange(game_count)
+
+        # starting state shared by every game, the same as SnakeEngine.reset
+        self.starting_body = np.array(get_starting_body(tile_count), dtype=np.int64)
+        self.starting_direction = SnakeEngine.DIRECTIONS.index(SnakeEngine.RIGHT)
+        starting_free_tiles = FreeTiles(range(cell_count))
+        for cell in self.starting_body:
+            starting_free_tiles.discard(int(cell))
+        self.starting_free_list = np.full(cell_count, -1, dtype=np.int64)
+        self.starting_free_list[:len(starting_free_tiles)] = starting_free_tiles.tiles
+        self.starting_free_index = np.full(cell_count, -1, dtype=np.int64)
+        self.starting_free_index[starting_free_tiles.tiles] = np.arange(len(starting_free_tiles))
+
+        # snake body as a ring buffer per game, head at body[game, head_idx]
+        self.body_capacity = cell_count + 1  # head can overlap the body on the losing move
+        self.body = np.zeros((game_count, self.body_capacity), dtype=np.int64)
+        self.head_idx = np.zeros(game_count, dtype=np.int64)
+        self.length = np.zeros(game_count, dtype=np.int64)
+        self.occupied = np.zeros((game_count, cell_count), dtype=bool)  # cells under the snake
+        self.direction = np.zeros(game_count, dtype=np.int64)
+        self.grow = np.zeros(game_count, dtype=bool)
+
+        # open tiles as an indexable set per game, same swap-remove order as FreeTiles
+        self.free_list = np.zeros((game_count, cell_count), dtype=np.int64)
+        self.free_index = np.zeros((game_count, cell_count), dtype=np.int64)  # cell -> index, -1 if taken
+        self.free_count = np.zeros(game_count, dtype=np.int64)
+
+        # fruits, -1 for a fruit removed once the board filled up
+        self.fruits = np.full((game_count, fruit_count), -1, dtype=np.int64)
+        self.is_fruit = np.zeros((game_count, cell_count), dtype=bool)
+
+        # game state
+        self.score = np.zeros(game_count, dtype=np.int64)
+        self.steps = np.zeros(game_count, dtype=np.int64)
+        self.games_played = np.zeros(game_count, dtype=np.int64)
+
+        # results of the last finished game, valid where step returned done
+        self.final_score = np.zeros(game_count, dtype=np.int64)
+        self.final_steps = np.zeros(game_count, dtype=np.int64)
+        self.final_loss_cause = np.zeros(game_count, dtype=np.int64)
+
+        # initialize games
+        self.reset(self.games)
+
+    def reset(self, games) -> None:
+        """
+        purpose: put the given games back at the start, like SnakeEngine.reset
+        :param games: array of game indices
+        """
+        games = np.asarray(games, dtype=np.int64)
+        if not len(games):
+            return
+
+        # snake
+        body_length = len(self.starting_body)
+        self.body[games, :body_length] = self.starting_body
+        self.head_idx[games] = 0
+        self.length[games] = body_length
+        self.occupied[games] = False
+        self.occupied[games[:, None], self.starting_body] = True
+        self.direction[games] = self.starting_direction
+        self.grow[games] = True
+
+        # game state
+        self.score[games] = 0
+        self.steps[games] = 0
+
+        # open tiles
+        self.free_list[games] = self.starting_free_list
+        self.free_index[games] = self.starting_free_index
+        self.free_count[games] = self.cell_count - body_length
+
+        # fruits
+        self.fruits[games] = -1
+        self.is_fruit[games] = False
+        for game_idx in games.tolist():
+            for fruit_idx in range(self.fruit_count):
+                cell = self.get_random_open_tile(game_idx)
+                if cell < 0:
+                    break
+                self.discard_free(game_idx, cell)
+                self.fruits[game_idx, fruit_idx] = cell
+                self.is_fruit[game_idx, cell] = True
+
+    def step(self, actions) -> tuple:
+        """
+        purpose: move every snake one tile, eat fruit, check for a win or loss and reset finished games
+        :param actions: direction index per game, -1 or a reversal keeps the current direction
+        :return rewards: fruits eaten per game this step
+        :return dones: True for games that finished this step and were reset
+        """
+        games = self.games
+        actions = np.asarray(actions, dtype=np.int64)
+
+        # update current direction, snake can't turn back on itself
+        turning = (actions >= 0) & (actions != (self.direction + 2) % 4)
+        self.direction = np.where(turning, actions, self.direction)
+        self.steps += 1
+
+        # check if snake off board, body stays on the last tile it reached
+        head = self.body[games, self.head_idx]
+        new_head_x = head % self.tile_count + self.direction_x[self.direction]
+        new_head_y = head // self.tile_count + self.direction_y[self.direction]
+        wall = (new_head_x < 0) | (new_head_x >= self.tile_count) | (new_head_y < 0) | (new_head_y >= self.tile_count)
+        moving = ~wall
+        moving_games = games[moving]
+        new_head = (new_head_y * self.tile_count + new_head_x)[moving]
+
+        # check for collision before the body moves, tail tile still counts
+        colliding = np.zeros(self.game_count, dtype=bool)
+        colliding[moving] = self.occupied[moving_games, new_head]
+
+        # drop last segment unless growing
+        shrinking = moving & ~self.grow
+        shrinking_games = games[shrinking]
+        tail_idx = (self.head_idx[shrinking] + self.length[shrinking] - 1) % self.body_capacity
+        tail = self.body[shrinking_games, tail_idx]
+        self.occupied[shrinking_games, tail] = False
+        self.add_free(shrinking_games, tail)
+        self.length[shrinking] -= 1
+        self.grow[moving] = False
+
+        # add new head
+        self.head_idx[moving] = (self.head_idx[moving] - 1) % self.body_capacity
+        self.body[moving_games, self.head_idx[moving]] = new_head
+        self.length[moving] += 1
+        self.occupied[moving_games, new_head] = True
+        on_free = self.free_index[moving_games, new_head] >= 0  # not open if on a fruit
+        self.discard_free(moving_games[on_free], new_head[on_free])
+
+        # eat fruit if snake on fruit
+        lost = wall | colliding
+        rewards = np.zeros(self.game_count, dtype=np.int64)
+        eating = np.zeros(self.game_count, dtype=bool)
+        eating[moving] = self.is_fruit[moving_games, new_head]
+        eating &= ~lost
+        for game_idx in games[eating].tolist():
+            head_cell = self.body[game_idx, self.head_idx[game_idx]]
+            self.score[game_idx] += 1
+            rewards[game_idx] = 1
+            # queue snake growth on next move
+            self.grow[game_idx] = True
+            # move fruit
+            self.spawn_fruit(game_idx, int(np.flatnonzero(self.fruits[game_idx] == head_cell)[0]))
+
+        # check for win, fruits all removed
+        won = ~lost & (self.fruits < 0).all(axis=1)
+        dones = lost | won
+
+        # keep results and reset finished games
+        if dones.any():
+            finished = games[dones]
+            self.final_score[finished] = self.score[finished]
+            self.final_steps[finished] = self.steps[finished]
+            self.final_loss_cause[finished] = np.where(wall[finished], self.WALL,
+                                                       np.where(colliding[finished], self.COLLISION, self.NOT_LOST))
+            self.games_played[finished] += 1
+            self.reset(finished)
+
+        return rewards, dones
+
+    def add_free(self, games, cells) -> None:
+        """
+        purpose: mark cells as open, one cell per game
+        """
+        free_idx = self.free_count[games]
+        self.free_list[games, free_idx] = cells
+        self.free_index[games, cells] = free_idx
+        self.free_count[games] += 1
+
+    def discard_free(self, games, cells) -> None:
+        """
+        purpose: mark open cells as taken by swapping the last open cell into their slot, one cell per game
+        """
+        free_idx = self.free_index[games, cells]
+        self.free_count[games] -= 1
+        last_cells = self.free_list[games, self.free_count[games]]
+        self.free_list[games, free_idx] = last_cells
+        self.free_index[games, last_cells] = free_idx
+        self.free_index[games, cells] = -1
+
+    def get_random_open_tile(self, game_idx: int) -> int:
+        """
+        purpose: pick a random open tile for one game
+        :return cell: cell id of the tile, -1 if the board is full
+        """
+        free_count = int(self.free_count[game_idx])
+        if not free_count:
+            return -1
+        return int(self.free_list[game_idx, self.randoms[game_idx].randint(0, free_count - 1)])
+
+    def spawn_fruit(self, game_idx: int, fruit_idx: int) -> None:
+        """
+        purpose: move a fruit to an open tile, removing it if there are none left
+        """
+        self.is_fruit[game_idx, self.fruits[game_idx, fruit_idx]] = False
+        cell = self.get_random_open_tile(game_idx)
+        if cell >= 0:
+            # old fruit tile is under the snake head, so it stays taken
+            self.discard_free(game_idx, cell)
+            self.fruits[game_idx, fruit_idx] = cell
+            self.is_fruit[game_idx, cell] = True
+        else:  # no open tiles left, remove fruit, keeping the order of the rest
+            remaining = np.delete(self.fruits[game_idx], fruit_idx)
+            self.fruits[game_idx, :-1] = remaining
+            self.fruits[game_idx, -1] = -1
+
+    def get_heads(self) -> np.ndarray:
+        """
+        purpose: get head cell of every game
+        """
+        return self.body[self.games, self.head_idx]
+
+    def get_boards(self) -> np.ndarray:
+        """
+        purpose: get every board as a grid, 0 open, 1 snake body, 2 snake head, 3 fruit
+        :return boards: int8 array shaped (game_count, tile_count, tile_count)
+        """
+        boards = self.occupied.astype(np.int8)
+        boards[self.is_fruit] = 3
+        boards[self.games, self.get_heads()] = 2
+        return boards.reshape(self.game_count, self.tile_count, self.tile_count)
+
+    def get_body(self, game_idx: int) -> list:
+        """
+        purpose: get body cells of one game, head first, to compare with SnakeEngine.body
+        """
+        body_idx = (self.head_idx[game_idx] + np.arange(self.length[game_idx])) % self.body_capacity
+        return self.body[game_idx, body_idx].tolist()
+
+
+# --- test ---
+if __name__ == "__main__":
+    import time
+
+    # play random games as fast as possible
+    game_count = 1000
+    step_count = 1000
+    batch_engine = BatchSnakeEngine(game_count, tile_count=17, fruit_count=1, seed=0)
+    action_rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(step_count):
+        batch_engine.step(action_rng.integers(-1, 4, game_count))
+    elapsed = time.perf_counter() - start
+    print(f'{game_count * step_count} steps, {batch_engine.games_played.sum()} games in {elapsed:.3f}s '
+          f'({game_count * step_count / elapsed:.0f} steps/s)')
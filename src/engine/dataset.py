@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""dataset.py: append only trajectory files for training, read back memory mapped"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import json
+import os
+
+import numpy as np
+
+from src.engine.engine import SnakeEngine
+
+
+# --- funcs ---
+def get_fields(tile_count: int, fruit_count: int) -> dict:
+    """
+    purpose: get dtype and per step shape of every field stored for a board size
+    grid is 0 open, 1 snake body, 2 snake head, 3 fruit like BatchSnakeEngine.get_boards
+    positions are (x, y) tiles, -1 for a fruit removed once the board filled up
+    direction and action are indices into SnakeEngine.DIRECTIONS, action -1 keeps going straight
+    """
+    return {'grid': ('uint8', (tile_count, tile_count)),
+            'head': ('int16', (2,)),
+            'direction': ('uint8', ()),
+            'fruits': ('int16', (fruit_count, 2)),
+            'action': ('int8', ()),
+            'reward': ('int8', ()),
+            'done': ('bool', ())}
+
+
+def get_action_idx(action) -> int:
+    """
+    purpose: get direction index of an action passed to SnakeEngine.step, -1 for None
+    """
+    if action is None:
+        return -1
+    return SnakeEngine.DIRECTIONS.index((int(action[0]), int(action[1])))
+
+
+# --- classes ---
+class TrajectoryWriter:
+    """
+    purpose: stream steps into a dataset directory as chunks of fixed dtype .npy files
+    each step stores the observation before the action, the action and the reward and done flag it led to
+    chunks are only listed in meta.json once fully written, so an interrupted run leaves a readable dataset
+    opening an existing dataset appends to it
+    """
+    def __init__(self, dataset_dir: str,
+                 tile_count: int,
+                 fruit_count: int,
+                 chunk_size: int = 65536):
+        # attr from params
+        self.dataset_dir = dataset_dir
+        self.tile_count = tile_count
+        self.fruit_count = fruit_count
+
+        # existing dataset, new steps go into new chunks after the old ones
+        os.makedirs(dataset_dir, exist_ok=True)
+        self.meta_fl = os.path.join(dataset_dir, 'meta.json')
+        if os.path.exists(self.meta_fl):
+            with open(self.meta_fl) as meta_file:
+                self.meta = json.load(meta_file)
+            if (self.meta['tile_count'], self.meta['fruit_count']) != (tile_count, fruit_count):
+                raise ValueError(f"dataset is for {self.meta['tile_count']} tiles and {self.meta['fruit_count']} "
+                                 f"fruits, not {tile_count} and {fruit_count}")
+            chunk_size = self.meta['chunk_size']
+        else:
+            self.meta = {'version': 1,
+                         'tile_count': tile_count,
+                         'fruit_count': fruit_count,
+                         'chunk_size': chunk_size,
+                         'fields': {name: [dtype, list(shape)]
+                                    for name, (dtype, shape) in get_fields(tile_count, fruit_count).items()},
+                         'chunk_lengths': []}
+        self.chunk_size = chunk_size
+
+        # steps waiting to be written, one preallocated array per field
+        self.buffers = {name: np.zeros((chunk_size,) + tuple(shape), dtype=dtype)
+                        for name, (dtype, shape) in self.meta['fields'].items()}
+        self.buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, grid, head, direction: int, fruits, action: int, reward: int, done: bool) -> None:
+        """
+        purpose: buffer one step, writing a chunk once the buffer is full
+        """
+        idx = self.buffered
+        buffers = self.buffers
+        buffers['grid'][idx] = grid
+        buffers['head'][idx] = head
+        buffers['direction'][idx] = direction
+        buffers['fruits'][idx] = fruits
+        buffers['action'][idx] = action
+        buffers['reward'][idx] = reward
+        buffers['done'][idx] = done
+        self.buffered += 1
+        if self.buffered == self.chunk_size:
+            self.flush()
+
+    def step(self, engine: SnakeEngine, action=None) -> int:
+        """
+        purpose: observe the engine, step it with action and record the step
+        :return eaten: number of fruits eaten by the step
+        """
+        # observation before the step
+        grid = np.zeros(self.tile_count * self.tile_count, dtype=np.uint8)
+        grid[list(engine.occupied)] = 1
+        fruits = np.full((self.fruit_count, 2), -1, dtype=np.int16)
+        if engine.fruits:
+            grid[engine.fruits] = 3
+            fruits[:len(engine.fruits)] = [engine.get_position(cell) for cell in engine.fruits]
+        grid[engine.head] = 2
+        head = engine.get_position(engine.head)
+        direction = SnakeEngine.DIRECTIONS.index(engine.direction)
+
+        eaten = engine.step(action)
+        self.add(grid.reshape(self.tile_count, self.tile_count), head, direction, fruits,
+                 get_action_idx(action), eaten, engine.done)
+        return eaten
+
+    def step_batch(self, batch_engine, actions) -> tuple:
+        """
+        purpose: observe every game of a BatchSnakeEngine, step them and record one step per game
+        :return rewards, dones: results of BatchSnakeEngine.step
+        """
+        # observation before the step
+        grids = batch_engine.get_boards()
+        heads = batch_engine.get_heads()
+        fruits = batch_engine.fruits
+        fruit_positions = np.where(fruits[..., None] >= 0,
+                                   np.stack((fruits % self.tile_count, fruits // self.tile_count), axis=-1), -1)
+        directions = batch_engine.direction.copy()
+
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards, dones = batch_engine.step(actions)
+        self.add_many({'grid': grids,
+                       'head': np.stack((heads % self.tile_count, heads // self.tile_count), axis=-1),
+                       'direction': directions,
+                       'fruits': fruit_positions,
+                       'action': actions,
+                       'reward': rewards,
+                       'done': dones})
+        return rewards, dones
+
+    def add_many(self, steps: dict) -> None:
+        """
+        purpose: buffer many steps given as field name -> array with one row per step
+        """
+        step_count = len(steps['done'])
+        start = 0
+        while start < step_count:
+            count = min(step_count - start, self.chunk_size - self.buffered)
+            for name, buffer in self.buffers.items():
+                buffer[self.buffered:self.buffered + count] = steps[name][start:start + count]
+            self.buffered += count
+            start += count
+            if self.buffered == self.chunk_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """
+        purpose: write buffered steps as a new chunk, then list it in meta.json
+        """
+        if not self.buffered:
+            return
+        chunk_idx = len(self.meta['chunk_lengths'])
+        for name, buffer in self.buffers.items():
+            chunk_fl = os.path.join(self.dataset_dir, f'chunk_{chunk_idx:06d}_{name}.npy')
+            np.save(chunk_fl, buffer[:self.buffered])
+        self.meta['chunk_lengths'].append(self.buffered)
+        self.buffered = 0
+
+        # replace meta.json in one go so readers never see it half written
+        temporary_fl = self.meta_fl + '.tmp'
+        with open(temporary_fl, 'w') as meta_file:
+            json.dump(self.meta, meta_file)
+        os.replace(temporary_fl, self.meta_fl)
+
+    def close(self) -> None:
+        """
+        purpose: write any buffered steps
+        """
+        self.flush()
+
+
+class TrajectoryDataset:
+    """
+    purpose: random access to a dataset written by TrajectoryWriter without loading it into memory
+    chunks are memory mapped on first use, so indexing returns views into the files
+    """
+    def __init__(self, dataset_dir: str):
+        # attr from params
+        self.dataset_dir = dataset_dir
+
+        with open(os.path.join(dataset_dir, 'meta.json')) as meta_file:
+            self.meta = json.load(meta_file)
+        self.tile_count = self.meta['tile_count']
+        self.fruit_count = self.meta['fruit_count']
+        self.fields = list(self.meta['fields'])
+
+        # global step index of the first step in each chunk
+        self.chunk_starts = np.concatenate(([0], np.cumsum(self.meta['chunk_lengths'])))
+        self.chunks = {}  # chunk idx -> field name -> memory mapped array
+
+    def __len__(self) -> int:
+        return int(self.chunk_starts[-1])
+
+    def __getitem__(self, idx: int) -> dict:
+        """
+        purpose: get one step as field name -> array
+        """
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'step {idx} out of range for {len(self)} steps')
+        chunk_idx = int(np.searchsorted(self.chunk_starts, idx, side='right')) - 1
+        offset = idx - self.chunk_starts[chunk_idx]
+        return {name: array[offset] for name, array in self.get_chunk(chunk_idx).items()}
+
+    def get_chunk(self, chunk_idx: int) -> dict:
+        """
+        purpose: get every field of a chunk as memory mapped arrays
+        """
+        chunk = self.chunks.get(chunk_idx)
+        if chunk is None:
+            chunk = {name: np.load(os.path.join(self.dataset_dir, f'chunk_{chunk_idx:06d}_{name}.npy'), mmap_mode='r')
+                     for name in self.fields}
+            self.chunks[chunk_idx] = chunk
+        return chunk
+
+    def get_batch(self, indices) -> dict:
+        """
+        purpose: gather many steps, e.g. a shuffled training batch
+        :return batch: field name -> array with one row per index, in the order given
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        chunk_indices = np.searchsorted(self.chunk_starts, indices, side='right') - 1
+        batch = {name: np.empty((len(indices),) + tuple(shape), dtype=dtype)
+                 for name, (dtype, shape) in self.meta['fields'].items()}
+        # one fancy index per chunk touched
+        for chunk_idx in np.unique(chunk_indices).tolist():
+            in_chunk = chunk_indices == chunk_idx
+            offsets = indices[in_chunk] - self.chunk_starts[chunk_idx]
+            for name, array in self.get_chunk(chunk_idx).items():
+                batch[name][in_chunk] = array[offsets]
+        return batch
+
+
+# --- test ---
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import time
+    from random import Random
+
+    # record random games and read them back
+    dataset_dir = tempfile.mkdtemp()
+    engine = SnakeEngine(tile_count=17, fruit_count=1, seed=0)
+    player = Random(1)
+    start = time.perf_counter()
+    with TrajectoryWriter(dataset_dir, engine.tile_count, engine.fruit_count, chunk_size=4096) as writer:
+        for _ in range(1000):
+            engine.reset()
+            while not engine.done:
+                writer.step(engine, player.choice(SnakeEngine.DIRECTIONS))
+    elapsed = time.perf_counter() - start
+
+    dataset = TrajectoryDataset(dataset_dir)
+    batch = dataset.get_batch(np.random.default_rng(0).integers(0, len(dataset), 256))
+    print(f'{len(dataset)} steps written in {elapsed:.3f}s ({len(dataset) / elapsed:.0f} steps/s), '
+          f'{int(dataset[-1]["done"])} done on the last step, batch grid {batch["grid"].shape}')
+    shutil.rmtree(dataset_dir)
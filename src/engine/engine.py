@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""engine.py: headless snake game rules, no pygame required"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+from collections import deque
+from random import Random
+
+from src.engine.free_tiles import FreeTiles
+
+
+# --- funcs ---
+def get_starting_body(tile_count: int) -> list:
+    """
+    purpose: get the cell ids of a new snake, head first, three tiles facing right along the middle row
+    """
+    middle_row = int(tile_count / 2 + 0.5)
+    return [middle_row * tile_count + x for x in (3, 2, 1)]
+
+
+# --- classes ---
+class SnakeEngine:
+    """
+    purpose: pure python snake game state, moved one tile per step
+    tiles are stored as integer cell ids, cell = y * tile_count + x
+    """
+    # directions an action can take, (x, y) in tiles
+    UP = (0, -1)
+    LEFT = (-1, 0)
+    DOWN = (0, 1)
+    RIGHT = (1, 0)
+    DIRECTIONS = (UP, RIGHT, DOWN, LEFT)  # direction index -> direction
+
+    def __init__(self,
+                 tile_count: int,
+                 fruit_count: int,
+                 seed=None):
+        # attr from params
+        self.tile_count = tile_count
+        self.fruit_count = fruit_count
+        self.seed = seed
+        self.random = Random(seed)
+
+        # starting state to reset to on loss
+        self.starting_body = get_starting_body(tile_count)
+        self.starting_direction = self.RIGHT
+
+        # initialize game
+        self.reset()
+
+    def reset(self, seed=None) -> None:
+        """
+        purpose: put snake back at the start, clear the score and respawn all fruit
+        :param seed: reseed fruit spawns, e.g. to replay a game, None carries on with the current random state
+        """
+        if seed is not None:
+            self.seed = seed
+            self.random = Random(seed)
+
+        # snake
+        self.body = deque(self.starting_body)  # cell ids, head first
+        self.occupied = set(self.body)  # cells under the snake
+        self.direction = self.starting_direction
+        self.grow = True  # used to queue growth on next move
+
+        # game state
+        self.score = 0
+        self.steps = 0
+        self.lost = False
+        self.won = False
+        self.loss_cause = None  # 'collision' or 'wall' once lost
+
+        # open tiles, kept up to date as the snake moves and fruit spawns
+        self.free_tiles = FreeTiles(range(self.tile_count * self.tile_count))
+        for cell in self.body:
+            self.free_tiles.discard(cell)
+
+        # fruits
+        self.fruits = []
+        for _ in range(self.fruit_count):
+            tile = self.get_random_open_tile()
+            if tile is None:
+                break
+            self.free_tiles.remove(tile)
+            self.fruits.append(tile)
+
+    @property
+    def done(self) -> bool:
+        """
+        purpose: check if the game is over
+        """
+        return self.lost or self.won
+
+    @property
+    def head(self) -> int:
+        """
+        purpose: get cell the snake head is on
+        """
+        return self.body[0]
+
+    def get_cell(self, x: int, y: int) -> int:
+        """
+        purpose: get cell id for a tile position
+        """
+        return y * self.tile_count + x
+
+    def get_position(self, cell: int) -> tuple:
+        """
+        purpose: get (x, y) tile position for a cell id
+        """
+        y, x = divmod(cell, self.tile_count)
+        return x, y
+
+    def step(self, action=None) -> int:
+        """
+        purpose: move snake one tile, eat fruit and check for a win or loss
+        :param action: (x, y) direction to turn to, None or a reversal keeps the current direction
+        :return eaten: number of fruits eaten this step
+        """
+        # nothing moves once the game is over
+        if self.lost or self.won:
+            return 0
+
+        # update current direction, snake can't turn back on itself
+        if action is not None:
+            action = (int(action[0]), int(action[1]))
+            if action not in self.DIRECTIONS:
+                raise ValueError(f'action must be one of {self.DIRECTIONS} or None, got {action}')
+            if action != (-self.direction[0], -self.direction[1]):
+                self.direction = action
+
+        self.steps += 1
+
+        # check if snake off board, body stays on the last tile it reached
+        head_y, head_x = divmod(self.body[0], self.tile_count)
+        new_head_x = head_x + self.direction[0]
+        new_head_y = head_y + self.direction[1]
+        if not (0 <= new_head_x < self.tile_count and 0 <= new_head_y < self.tile_count):
+            self.loss_cause = 'wall'
+            self.lost = True
+            return 0
+
+        # check for collision before the body moves, tail tile still counts
+        new_head = new_head_y * self.tile_count + new_head_x
+        colliding = new_head in self.occupied
+
+        # check for and handle growth
+        if self.grow:  # keep all segments
+            self.grow = False
+        else:  # drop last segment
+            tail = self.body.pop()
+            self.occupied.discard(tail)
+            self.free_tiles.add(tail)
+        self.body.appendleft(new_head)
+        self.occupied.add(new_head)
+        self.free_tiles.discard(new_head)  # not open if on a fruit
+
+        # check for self collision
+        if colliding:
+            self.loss_cause = 'collision'
+            self.lost = True
+            return 0
+
+        # eat fruit if snake on fruit
+        eaten = 0
+        for fruit_idx, fruit in enumerate(self.fruits):
+            if fruit == new_head:
+                self.score += 1
+                eaten += 1
+                # queue snake growth on next move
+                self.grow = True
+                # move fruit
+                self.spawn_fruit(fruit_idx)
+                break
+
+        # check for win
+        if not self.fruits:
+            self.won = True
+
+        return eaten
+
+    def get_open_tiles(self) -> list:
+        """
+        purpose: get a list of tiles without the snake or a fruit
+        """
+        return list(self.free_tiles)
+
+    def get_random_open_tile(self):
+        """
+        purpose: pick a random open tile
+        :return tile: cell id of the tile, None if the board is full
+        """
+        return self.free_tiles.choice(self.random)
+
+    def spawn_fruit(self, fruit_idx: int) -> None:
+        """
+        purpose: move a fruit to an open tile, removing it if there are none left
+        """
+        tile = self.get_random_open_tile()
+        if tile is not None:
+            # old fruit tile is under the snake head, so it stays taken
+            self.free_tiles.remove(tile)
+            self.fruits[fruit_idx] = tile
+        else:  # no open tiles left, remove fruit
+            del self.fruits[fruit_idx]
+
+
+# --- test ---
+if __name__ == "__main__":
+    import time
+
+    # play random games as fast as possible
+    player = Random(1)
+    engine = SnakeEngine(tile_count=17, fruit_count=1, seed=0)
+    game_count = 1000
+    total_steps = 0
+    start = time.perf_counter()
+    for _ in range(game_count):
+        engine.reset()
+        while not engine.done:
+            engine.step(player.choice(SnakeEngine.DIRECTIONS))
+        total_steps += engine.steps
+    elapsed = time.perf_counter() - start
+    print(f'{game_count} games, {total_steps} steps in {elapsed:.3f}s '
+          f'({total_steps / elapsed:.0f} steps/s)')
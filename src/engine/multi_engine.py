@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""multi_engine.py: headless snake rules for several snakes sharing one board"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+from collections import deque
+from random import Random
+
+from src.engine.engine import SnakeEngine
+from src.engine.free_tiles import FreeTiles
+
+
+# --- classes ---
+class MultiSnake:
+    """
+    purpose: state of one snake on a shared board
+    """
+    def __init__(self, snake_id: int):
+        self.snake_id = snake_id
+        self.body = deque()  # cell ids, head first
+        self.direction = SnakeEngine.RIGHT
+        self.grow = 0  # segments left to grow, one per move
+        self.alive = False
+        self.score = 0
+
+
+class MultiSnakeEngine:
+    """
+    purpose: move every snake on a shared board one tile per step with the same rules as SnakeEngine
+    a snake dies on a wall, any snake body (tails still count) or another head, its tiles are freed right away
+    tiles are stored as integer cell ids, cell = y * tile_count + x
+    """
+    def __init__(self,
+                 tile_count: int,
+                 fruit_count: int,
+                 seed=None):
+        # attr from params
+        self.tile_count = tile_count
+        self.fruit_count = fruit_count
+        self.seed = seed
+        self.random = Random(seed)
+
+        # board
+        self.snakes = {}  # snake id -> MultiSnake
+        self.occupied = set()  # cells under any snake
+        self.free_tiles = FreeTiles(range(tile_count * tile_count))
+        self.fruits = []  # cell id per fruit, None while the board is too full to place it
+        for _ in range(fruit_count):
+            self.fruits.append(self.take_random_open_tile())
+        self.steps = 0
+
+    def get_cell(self, x: int, y: int) -> int:
+        """
+        purpose: get cell id for a tile position
+        """
+        return y * self.tile_count + x
+
+    def get_position(self, cell: int) -> tuple:
+        """
+        purpose: get (x, y) tile position for a cell id
+        """
+        y, x = divmod(cell, self.tile_count)
+        return x, y
+
+    def take_random_open_tile(self):
+        """
+        purpose: pick a random open tile and mark it taken
+        :return tile: cell id of the tile, None if the board is full
+        """
+        tile = self.free_tiles.choice(self.random)
+        if tile is not None:
+            self.free_tiles.remove(tile)
+        return tile
+
+    def add_snake(self, snake_id: int) -> MultiSnake:
+        """
+        purpose: add a snake, it stays off the board until spawned
+        """
+        snake = MultiSnake(snake_id)
+        self.snakes[snake_id] = snake
+        return snake
+
+    def remove_snake(self, snake_id: int) -> None:
+        """
+        purpose: take a snake off the board for good, e.g. when its player leaves
+        """
+        self.kill(self.snakes.pop(snake_id))
+
+    def spawn(self, snake_id: int):
+        """
+        purpose: put a dead snake back on a random open tile, it grows to 3 tiles over its first moves
+        :return cell: cell id the snake spawned on, None if the board is full
+        """
+        snake = self.snakes[snake_id]
+        cell = self.take_random_open_tile()
+        if cell is None:
+            return None
+        snake.body = deque((cell,))
+        snake.alive = True
+        snake.grow = 2
+        snake.score = 0
+        self.occupied.add(cell)
+
+        # face the side with the most room
+        x, y = self.get_position(cell)
+        room = {SnakeEngine.RIGHT: self.tile_count - 1 - x, SnakeEngine.LEFT: x,
+                SnakeEngine.DOWN: self.tile_count - 1 - y, SnakeEngine.UP: y}
+        snake.direction = max(SnakeEngine.DIRECTIONS, key=room.get)
+        return cell
+
+    def kill(self, snake: MultiSnake) -> None:
+        """
+        purpose: take a snake off the board, freeing its tiles
+        """
+        for cell in snake.body:
+            self.occupied.discard(cell)
+            self.free_tiles.add(cell)
+        snake.body.clear()
+        snake.alive = False
+
+    def step(self, actions: dict) -> tuple:
+        """
+        purpose: move every living snake one tile, eat fruit and kill snakes that crashed
+        :param actions: snake id -> (x, y) direction to turn to, missing snakes keep going straight
+        :return moves: (snake id, new head, tail dropped, ate fruit) per snake that moved
+        :return deaths: ids of snakes that died
+        :return fruit_moves: (fruit idx, new cell or None) per fruit that moved
+        """
+        # check every action before anything moves
+        for action in actions.values():
+            if action is not None and (int(action[0]), int(action[1])) not in SnakeEngine.DIRECTIONS:
+                raise ValueError(f'action must be one of {SnakeEngine.DIRECTIONS} or None, got {action}')
+
+        self.steps += 1
+        tile_count = self.tile_count
+        occupied = self.occupied
+
+        # pick new heads, snakes can't turn back on themselves
+        new_heads = {}  # snake id -> new head
+        deaths = []
+        for snake_id, snake in self.snakes.items():
+            if not snake.alive:
+                continue
+            action = actions.get(snake_id)
+            if action is not None:
+                action = (int(action[0]), int(action[1]))
+                if action != (-snake.direction[0], -snake.direction[1]):
+                    snake.direction = action
+            head_y, head_x = divmod(snake.body[0], tile_count)
+            new_head_x = head_x + snake.direction[0]
+            new_head_y = head_y + snake.direction[1]
+            # off board or into a body before anything moves, tails still count
+            new_head = new_head_y * tile_count + new_head_x
+            if not (0 <= new_head_x < tile_count and 0 <= new_head_y < tile_count) or new_head in occupied:
+                deaths.append(snake_id)
+            else:
+                new_heads[snake_id] = new_head
+
+        # heads meeting on the same tile both die
+        head_counts = {}
+        for new_head in new_heads.values():
+            head_counts[new_head] = head_counts.get(new_head, 0) + 1
+        for snake_id, new_head in list(new_heads.items()):
+            if head_counts[new_head] > 1:
+                deaths.append(snake_id)
+                del new_heads[snake_id]
+        for snake_id in deaths:
+            self.kill(self.snakes[snake_id])
+
+        # move surviving snakes
+        moves = []
+        fruit_moves = []
+        for snake_id, new_head in new_heads.items():
+            snake = self.snakes[snake_id]
+            tail_dropped = not snake.grow
+            if snake.grow:  # keep all segments
+                snake.grow -= 1
+            else:  # drop last segment
+                tail = snake.body.pop()
+                occupied.discard(tail)
+                self.free_tiles.add(tail)
+            snake.body.appendleft(new_head)
+            occupied.add(new_head)
+            self.free_tiles.discard(new_head)  # not open if on a fruit
+
+            # eat fruit if snake on fruit
+            ate = new_head in self.fruits
+            if ate:
+                snake.score += 1
+                snake.grow += 1
+                fruit_idx = self.fruits.index(new_head)
+                self.fruits[fruit_idx] = self.take_random_open_tile()
+                fruit_moves.append((fruit_idx, self.fruits[fruit_idx]))
+            moves.append((snake_id, new_head, tail_dropped, ate))
+
+        # place fruit that didn't fit on a full board
+        for fruit_idx, fruit in enumerate(self.fruits):
+            if fruit is None and self.free_tiles:
+                self.fruits[fruit_idx] = self.take_random_open_tile()
+                fruit_moves.append((fruit_idx, self.fruits[fruit_idx]))
+
+        return moves, deaths, fruit_moves
+
+
+# --- test ---
+if __name__ == "__main__":
+    import time
+
+    # random snakes respawning as they die
+    engine = MultiSnakeEngine(tile_count=32, fruit_count=8, seed=0)
+    player = Random(1)
+    for snake_id in range(8):
+        engine.add_snake(snake_id)
+    step_count = 10000
+    death_count = 0
+    start = time.perf_counter()
+    for _ in range(step_count):
+        for snake in engine.snakes.values():
+            if not snake.alive:
+                engine.spawn(snake.snake_id)
+        actions = {snake_id: player.choice(SnakeEngine.DIRECTIONS) for snake_id in engine.snakes
+                   if player.random() < 0.2}
+        death_count += len(engine.step(actions)[1])
+    elapsed = time.perf_counter() - start
+    print(f'{step_count} steps of {len(engine.snakes)} snakes, {death_count} deaths in {elapsed:.3f}s '
+          f'({step_count / elapsed:.0f} steps/s)')
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""observation.py: multi channel board grids for learning agents, updated in place as the game moves"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import numpy as np
+
+from src.engine.engine import SnakeEngine
+
+
+# --- constants ---
+# channels, index into the first axis of an observation
+HEAD = 0
+BODY = 1  # 1 under the snake, head and tail included, see ObservationEncoder.get_body_age for segment order
+TAIL = 2
+FRUIT = 3
+WALL = 4
+CHANNEL_NAMES = ('head', 'body', 'tail', 'fruit', 'wall')
+
+
+# --- classes ---
+class ObservationEncoder:
+    """
+    purpose: keep a (channels, rows, columns) grid of an engine up to date, touching only the cells a step changed
+    the board is surrounded by padding rings of wall cells so edges look the same as any other obstacle
+    the body channel only marks cells under the snake so its values never drift as a game goes on, the head
+    move each cell was entered on is kept apart from the observation for reading segment ages when asked
+    a step writes the new head, the freed tail and any fruit that moved, nothing else
+    """
+    def __init__(self, engine: SnakeEngine,
+                 padding: int = 1,
+                 dtype=np.float32,
+                 out: np.ndarray = None):
+        """
+        :param out: array of shape (channels, rows, columns) to keep the observation in, e.g. a row of a batch
+        """
+        # attr from params
+        self.engine = engine
+        self.padding = padding
+
+        side = engine.tile_count + 2 * padding
+        if out is None:
+            out = np.zeros((len(CHANNEL_NAMES), side, side), dtype=dtype)
+        self.observation = out
+        self.flat = out.reshape(len(CHANNEL_NAMES), side * side)  # view for setting cells by index
+
+        # flat index of each cell id inside the padding
+        tile_count = engine.tile_count
+        rows, columns = np.divmod(np.arange(tile_count * tile_count), tile_count)
+        self.cell_indices = ((rows + padding) * side + columns + padding).tolist()
+        self.entered = np.zeros(side * side, dtype=np.int64)  # head move each cell was entered on, 0 off the snake
+
+        # engine state as of the last update
+        self.steps = None
+        self.head = None
+        self.tail = None
+        self.length = None
+        self.fruits = None
+        self.head_moves = 0  # moves the head made since the last rebuild
+
+        self.rebuild()
+
+    def rebuild(self) -> np.ndarray:
+        """
+        purpose: write the whole observation from scratch
+        """
+        engine = self.engine
+        observation = self.observation
+        observation[:] = 0
+        padding = self.padding
+        if padding:
+            observation[WALL, :padding, :] = 1
+            observation[WALL, -padding:, :] = 1
+            observation[WALL, :, :padding] = 1
+            observation[WALL, :, -padding:] = 1
+
+        flat = self.flat
+        cell_indices = self.cell_indices
+        entered = self.entered
+        entered[:] = 0
+        body = engine.body
+        self.head_moves = len(body)
+        for head_moves, cell in enumerate(reversed(body), 1):
+            entered[cell_indices[cell]] = head_moves
+            flat[BODY, cell_indices[cell]] = 1
+        flat[HEAD, cell_indices[body[0]]] = 1
+        flat[TAIL, cell_indices[body[-1]]] = 1
+        for fruit in engine.fruits:
+            flat[FRUIT, cell_indices[fruit]] = 1
+        self.remember()
+        return observation
+
+    def update(self) -> np.ndarray:
+        """
+        purpose: bring the observation up to date, call after every step
+        anything but the next step of the same game, e.g. a reset, rebuilds the whole grid
+        :return observation: the observation array itself, not a copy
+        """
+        engine = self.engine
+        if self.steps is None or engine.steps != self.steps + 1 or engine.lost:
+            return self.rebuild()
+
+        flat = self.flat
+        cell_indices = self.cell_indices
+        body = engine.body
+        if body[0] != self.head:
+            # old tail dropped off unless the snake grew, cleared before the head in case it moved onto it
+            if len(body) == self.length:
+                tail_idx = cell_indices[self.tail]
+                self.entered[tail_idx] = 0
+                flat[BODY, tail_idx] = 0
+                flat[TAIL, tail_idx] = 0
+                flat[TAIL, cell_indices[body[-1]]] = 1
+            self.head_moves += 1
+            head_idx = cell_indices[body[0]]
+            flat[HEAD, cell_indices[self.head]] = 0
+            flat[HEAD, head_idx] = 1
+            self.entered[head_idx] = self.head_moves
+            flat[BODY, head_idx] = 1
+
+        if engine.fruits != self.fruits:
+            for fruit in self.fruits:
+                flat[FRUIT, cell_indices[fruit]] = 0
+            for fruit in engine.fruits:
+                flat[FRUIT, cell_indices[fruit]] = 1
+        self.remember()
+        return self.observation
+
+    def remember(self) -> None:
+        """
+        purpose: store the engine state the observation now shows
+        """
+        engine = self.engine
+        self.steps = engine.steps
+        self.head = engine.body[0]
+        self.tail = engine.body[-1]
+        self.length = len(engine.body)
+        self.fruits = list(engine.fruits)
+
+    def get_body_age(self, normalize: bool = False) -> np.ndarray:
+        """
+        purpose: get a new grid of moves since each segment was entered, 0 for the head and -1 off the snake
+        reads the whole board, unlike update
+        :param normalize: divide ages by the snake length, so the tail reads just under 1 at any length
+        """
+        entered = self.entered.reshape(self.observation.shape[1:])
+        age = np.where(entered > 0, self.head_moves - entered, -1)
+        if normalize:
+            return np.where(age >= 0, age / self.length, -1.0)
+        return age
+
+
+class ObservationBatch:
+    """
+    purpose: observations of many engines stacked in one (games, channels, rows, columns) array
+    every encoder writes straight into its row, so the stack is never copied
+    """
+    def __init__(self, engines: list,
+                 padding: int = 1,
+                 dtype=np.float32):
+        side = engines[0].tile_count + 2 * padding
+        self.observations = np.zeros((len(engines), len(CHANNEL_NAMES), side, side), dtype=dtype)
+        self.encoders = [ObservationEncoder(engine, padding, dtype, out=observation)
+                         for engine, observation in zip(engines, self.observations)]
+
+    def update(self) -> np.ndarray:
+        """
+        purpose: bring every observation up to date, call after stepping every engine
+        :return observations: the stacked array itself, not a copy
+        """
+        for encoder in self.encoders:
+            encoder.update()
+        return self.observations
+
+
+# --- test ---
+if __name__ == "__main__":
+    import time
+    from random import Random
+
+    # incremental updates match rebuilding from scratch
+    player = Random(0)
+    engines = [SnakeEngine(tile_count=12, fruit_count=3, seed=seed) for seed in range(8)]
+    batch = ObservationBatch(engines)
+    check = [ObservationEncoder(engine) for engine in engines]
+    for _ in range(5000):
+        for engine in engines:
+            if engine.done:
+                engine.reset()
+            engine.step(player.choice(SnakeEngine.DIRECTIONS))
+        batch.update()
+        for batch_encoder, encoder in zip(batch.encoders, check):
+            # entered moves count from different starts, the observations and ages match
+            encoder.rebuild()
+            assert np.array_equal(batch_encoder.observation, encoder.observation)
+            assert np.array_equal(batch_encoder.get_body_age(), encoder.get_body_age())
+    print('incremental observations match full rebuilds')
+
+    # cost of an update against a rebuild on a big board
+    engine = SnakeEngine(tile_count=100, fruit_count=1, seed=0)
+    encoder = ObservationEncoder(engine)
+    update_time = rebuild_time = 0
+    step_count = 0
+    while not engine.done and step_count < 2000:
+        engine.step(player.choice((SnakeEngine.DOWN, SnakeEngine.RIGHT)))
+        start = time.perf_counter()
+        encoder.update()
+        update_time += time.perf_counter() - start
+        start = time.perf_counter()
+        encoder.rebuild()
+        rebuild_time += time.perf_counter() - start
+        step_count += 1
+    print(f'100x100 board: update {update_time / step_count * 1e6:.1f}us, '
+          f'rebuild {rebuild_time / step_count * 1e6:.1f}us per step')
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""replay.py: record games as a seed plus turns and replay them exactly"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+from src.engine.engine import SnakeEngine
+
+
+# --- constants ---
+MAGIC = b'SNR'
+VERSION = 1
+
+
+# --- funcs ---
+def write_varint(data: bytearray, value: int) -> None:
+    """
+    purpose: append a non negative int, 7 bits per byte, high bit set on all but the last byte
+    """
+    if value < 0:
+        raise ValueError(f'varint must be non negative, got {value}')
+    while value >= 0x80:
+        data.append(value & 0x7f | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def read_varint(data: bytes, idx: int) -> tuple:
+    """
+    purpose: read an int written by write_varint
+    :return value: int read
+    :return idx: index of the byte after it
+    """
+    value = 0
+    shift = 0
+    while True:
+        if idx >= len(data):
+            raise ValueError('replay data cut off')
+        byte = data[idx]
+        idx += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, idx
+        shift += 7
+
+
+# --- classes ---
+class Replay:
+    """
+    purpose: everything needed to replay a game, the fruit seed and the steps the snake turned on
+    the engine is deterministic given its seed, so replaying the turns reproduces the game exactly
+    """
+    def __init__(self,
+                 tile_count: int,
+                 fruit_count: int,
+                 seed: int,
+                 steps: int,
+                 turns: list):
+        # attr from params
+        self.tile_count = tile_count
+        self.fruit_count = fruit_count
+        self.seed = seed
+        self.steps = steps  # steps in the game
+        self.turns = turns  # (step, direction index) in step order, step counts from 1
+        self.turns_by_step = dict(turns)
+
+    def get_action(self, step: int):
+        """
+        purpose: get action to pass to SnakeEngine.step for a step
+        :return action: direction the snake turns to, None to keep going straight
+        """
+        direction_idx = self.turns_by_step.get(step)
+        return None if direction_idx is None else SnakeEngine.DIRECTIONS[direction_idx]
+
+    def simulate(self, engine: SnakeEngine = None,
+                 until_step: int = None) -> SnakeEngine:
+        """
+        purpose: replay the game headlessly from the start
+        :param engine: engine to reset and replay on, a new one is made if None
+        :param until_step: step to stop after, the end of the game if None
+        :return engine: engine in the state after until_step
+        """
+        if engine is None:
+            engine = SnakeEngine(self.tile_count, self.fruit_count, self.seed)
+        else:
+            engine.reset(self.seed)
+
+        until_step = self.steps if until_step is None else min(until_step, self.steps)
+        turns_by_step = self.turns_by_step
+        directions = SnakeEngine.DIRECTIONS
+        while engine.steps < until_step and not engine.done:
+            direction_idx = turns_by_step.get(engine.steps + 1)
+            engine.step(None if direction_idx is None else directions[direction_idx])
+        return engine
+
+    def to_bytes(self) -> bytes:
+        """
+        purpose: pack the replay into a few bytes
+        a reversal can't happen, so each turn is 1 bit for left or right plus the steps since the last turn
+        """
+        data = bytearray(MAGIC)
+        data.append(VERSION)
+        for value in (self.tile_count, self.fruit_count, self.seed, self.steps):
+            write_varint(data, value)
+
+        direction_idx = SnakeEngine.DIRECTIONS.index(SnakeEngine.RIGHT)  # engine starting direction
+        last_step = 0
+        for step, turn_direction_idx in self.turns:
+            right = turn_direction_idx == (direction_idx + 1) % 4
+            write_varint(data, (step - last_step - 1) << 1 | right)
+            direction_idx = turn_direction_idx
+            last_step = step
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        """
+        purpose: unpack a replay made by to_bytes
+        """
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('not a snake replay')
+        if data[len(MAGIC)] != VERSION:
+            raise ValueError(f'unsupported replay version {data[len(MAGIC)]}')
+
+        idx = len(MAGIC) + 1
+        header = []
+        for _ in range(4):
+            value, idx = read_varint(data, idx)
+            header.append(value)
+        tile_count, fruit_count, seed, steps = header
+
+        turns = []
+        direction_idx = SnakeEngine.DIRECTIONS.index(SnakeEngine.RIGHT)
+        step = 0
+        while idx < len(data):
+            value, idx = read_varint(data, idx)
+            step += (value >> 1) + 1
+            direction_idx = (direction_idx + (1 if value & 1 else 3)) % 4
+            turns.append((step, direction_idx))
+        return cls(tile_count, fruit_count, seed, steps, turns)
+
+    def save(self, replay_fl: str) -> None:
+        """
+        purpose: write replay to a file
+        """
+        with open(replay_fl, 'wb') as replay_file:
+            replay_file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, replay_fl: str) -> 'Replay':
+        """
+        purpose: read a replay written by save
+        """
+        with open(replay_fl, 'rb') as replay_file:
+            return cls.from_bytes(replay_file.read())
+
+
+class ReplayRecorder:
+    """
+    purpose: build a replay of the game an engine is playing
+    call observe after every engine step, however the step was chosen
+    """
+    def __init__(self, engine: SnakeEngine):
+        if not isinstance(engine.seed, int) or engine.seed < 0:
+            raise ValueError(f'engine needs a non negative int seed to be replayed, got {engine.seed!r}')
+        # attr from params
+        self.engine = engine
+
+        self.seed = engine.seed
+        self.direction = engine.direction
+        self.turns = []
+
+    def observe(self) -> None:
+        """
+        purpose: record a turn if the last engine step changed direction
+        """
+        if self.engine.direction != self.direction:
+            self.direction = self.engine.direction
+            self.turns.append((self.engine.steps, SnakeEngine.DIRECTIONS.index(self.direction)))
+
+    def get_replay(self) -> Replay:
+        """
+        purpose: get a replay of the game so far
+        """
+        return Replay(self.engine.tile_count, self.engine.fruit_count, self.seed, self.engine.steps,
+                      list(self.turns))
+
+
+# --- test ---
+if __name__ == "__main__":
+    import sys
+    import time
+    from random import Random
+
+    # replay a file, or record a random game and check it replays exactly
+    if len(sys.argv) > 1:
+        replay = Replay.load(sys.argv[1])
+    else:
+        engine = SnakeEngine(tile_count=17, fruit_count=1, seed=12345)
+        recorder = ReplayRecorder(engine)
+        player = Random(1)
+        while not engine.done:
+            # mostly go straight so the game lasts
+            engine.step(player.choice(SnakeEngine.DIRECTIONS) if player.random() < 0.2 else None)
+            recorder.observe()
+        replay = recorder.get_replay()
+        replayed = replay.simulate()
+        print(f'replay matches: {list(replayed.body) == list(engine.body) and replayed.score == engine.score}')
+
+    start = time.perf_counter()
+    engine = replay.simulate()
+    elapsed = time.perf_counter() - start
+    print(f'{replay.steps} steps, {len(replay.turns)} turns, score {engine.score}, {len(replay.to_bytes())} bytes, '
+          f'replayed in {elapsed * 1000:.2f}ms ({replay.steps / max(elapsed, 1e-9):.0f} steps/s)')
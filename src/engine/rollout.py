@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""rollout.py: play seeded headless games across a process pool and stream the results"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import argparse
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from random import Random
+
+from src.engine.engine import SnakeEngine
+
+
+# --- funcs ---
+def random_policy(engine: SnakeEngine, seed: int):
+    """
+    purpose: policy factory for a bot that turns at random
+    :return policy: callable taking the engine and returning an action
+    """
+    rng = Random(seed)
+
+    def policy(engine: SnakeEngine):
+        return rng.choice(SnakeEngine.DIRECTIONS)
+
+    return policy
+
+
+def load_policy_factory(policy_spec: str):
+    """
+    purpose: import a policy factory from a 'module:function' string
+    a factory is called as factory(engine, seed) once per game and returns policy(engine) -> action
+    """
+    module_name, factory_name = policy_spec.split(':')
+    return getattr(importlib.import_module(module_name), factory_name)
+
+
+def play_game(seed: int,
+              tile_count: int,
+              fruit_count: int,
+              policy_factory,
+              max_steps: int) -> dict:
+    """
+    purpose: play one seeded game to the end
+    :return result: seed, score, length, steps, won, loss_cause and wall_time of the game
+    """
+    start = time.perf_counter()
+    engine = SnakeEngine(tile_count, fruit_count, seed)
+    policy = policy_factory(engine, seed)
+    while not engine.done and engine.steps < max_steps:
+        engine.step(policy(engine))
+
+    return {'seed': seed,
+            'score': engine.score,
+            'length': len(engine.body),
+            'steps': engine.steps,
+            'won': engine.won,
+            'loss_cause': engine.loss_cause,  # None if won or cut off at max_steps
+            'wall_time': time.perf_counter() - start}
+
+
+def play_shard(seeds: list,
+               tile_count: int,
+               fruit_count: int,
+               policy_spec: str,
+               max_steps: int) -> list:
+    """
+    purpose: play a batch of games in a worker process
+    """
+    policy_factory = load_policy_factory(policy_spec)
+    return [play_game(seed, tile_count, fruit_count, policy_factory, max_steps) for seed in seeds]
+
+
+def read_finished_seeds(results_fl: str) -> set:
+    """
+    purpose: get seeds already in a results file, skipping a line cut off by an interrupted run
+    """
+    finished_seeds = set()
+    if not os.path.exists(results_fl):
+        return finished_seeds
+    with open(results_fl) as results_file:
+        for line in results_file:
+            try:
+                finished_seeds.add(json.loads(line)['seed'])
+            except (ValueError, KeyError):
+                pass
+    return finished_seeds
+
+
+def run_rollouts(seeds,
+                 tile_count: int,
+                 fruit_count: int,
+                 policy_spec: str = 'src.engine.rollout:random_policy',
+                 max_steps: int = 100000,
+                 shard_size: int = 100,
+                 worker_count: int = None):
+    """
+    purpose: play every seed across a process pool, yielding results as shards finish
+    seeds are split into shards of shard_size games, at most two shards per worker are queued at once
+    :param policy_spec: 'module:function' of a policy factory, see load_policy_factory
+    :return results: generator of result dicts from play_game, in completion order
+    """
+    worker_count = worker_count or os.cpu_count()
+    seeds = iter(seeds)
+    with ProcessPoolExecutor(max_workers=worker_count) as executor:
+        pending = set()
+        seeds_left = True
+        while seeds_left or pending:
+            # keep workers busy without queueing every shard up front
+            while seeds_left and len(pending) < worker_count * 2:
+                shard = [seed for _, seed in zip(range(shard_size), seeds)]
+                if not shard:
+                    seeds_left = False
+                    break
+                pending.add(executor.submit(play_shard, shard, tile_count, fruit_count, policy_spec, max_steps))
+
+            # stream back finished shards
+            if pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield from future.result()
+
+
+# --- main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='play seeded headless snake games across all cores')
+    parser.add_argument('results_fl', help='JSON lines file to append results to, rerun to resume')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--tile-count', type=int, default=17)
+    parser.add_argument('--fruit-count', type=int, default=1)
+    parser.add_argument('--policy', default='src.engine.rollout:random_policy')
+    parser.add_argument('--max-steps', type=int, default=100000)
+    parser.add_argument('--shard-size', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    # skip games finished by an earlier, interrupted run
+    finished_seeds = read_finished_seeds(args.results_fl)
+    seeds = [seed for seed in range(args.first_seed, args.first_seed + args.games) if seed not in finished_seeds]
+    print(f'{len(finished_seeds)} games already finished, playing {len(seeds)}')
+
+    start = time.perf_counter()
+    game_count = 0
+    with open(args.results_fl, 'a+') as results_file:
+        # end a line cut off by an interrupted run so new results start on their own line
+        if results_file.tell():
+            results_file.seek(results_file.tell() - 1)
+            if results_file.read(1) != '\n':
+                results_file.write('\n')
+        for result in run_rollouts(seeds, args.tile_count, args.fruit_count, args.policy,
+                                   args.max_steps, args.shard_size, args.workers):
+            results_file.write(json.dumps(result) + '\n')
+            game_count += 1
+            if game_count % (args.shard_size * 10) == 0:
+                results_file.flush()
+    elapsed = time.perf_counter() - start
+    print(f'{game_count} games in {elapsed:.1f}s ({game_count / max(elapsed, 1e-9):.0f} games/s)')
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""state.py: snake game state that is cheap to copy, for search agents forking many futures"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+from collections import deque
+
+from src.engine.engine import SnakeEngine
+from src.engine.free_tiles import FreeTiles
+
+
+# --- constants ---
+RANDOM_MASK = (1 << 64) - 1
+SPAWN_TRIES = 16  # random picks over the whole board before drawing from the open tile index
+MAX_LAYERS = 8  # frozen body layers a state looks through before merging them
+
+
+# --- classes ---
+class GameState:
+    """
+    purpose: SnakeEngine rules on a state that clones in constant time
+    the body is kept as the step each cell was last entered on, a cell is under the snake if entered within
+    the last length steps, so moving only writes the new head and the tail never has to be found
+    those writes go in a small dict of this state's own, cloning freezes it onto a chain of layers shared with
+    the clone, so neither copies anything that scales with the board, cells are also kept newest first on
+    a shared linked list for reading the body back in order
+    fruit spawns come from an inline generator whose state is a single int, so a clone plays differently from
+    the engine it was taken from after a fruit
+    """
+    def __init__(self, engine: SnakeEngine,
+                 seed: int = 0):
+        """
+        purpose: snapshot an engine
+        :param seed: seed of fruit spawns from here on
+        """
+        self.tile_count = engine.tile_count
+        self.fruit_count = engine.fruit_count
+
+        # body, cell -> head move the cell was last entered on, newest layer first
+        self.entered = {}  # written by this state only
+        self.layers = None  # frozen dicts shared with clones, (layer, older layers) or None
+        self.depth = 0  # number of frozen layers
+        self.cells = None  # entered cells newest first, (cell, older cells) or None
+        for head_moves, cell in enumerate(reversed(engine.body), 1):
+            self.entered[cell] = head_moves
+            self.cells = (cell, self.cells)
+        self.head_moves = len(engine.body)
+        self.length = len(engine.body)
+        self.head = engine.head
+
+        # open tiles as of some earlier move, built the first time random picks can't find one
+        self.open_tiles = None  # FreeTiles, only ever read once built
+        self.open_body = ()  # body cells at the time, tail first
+        self.open_fruits = ()  # fruits at the time
+        self.open_tail_moves = 0  # head_moves - length at the time
+
+        # game state
+        self.direction = engine.direction
+        self.grow = engine.grow
+        self.fruits = tuple(engine.fruits)
+        self.score = engine.score
+        self.steps = engine.steps
+        self.lost = engine.lost
+        self.won = engine.won
+        self.loss_cause = engine.loss_cause
+        self.random_state = seed & RANDOM_MASK
+
+    @property
+    def done(self) -> bool:
+        """
+        purpose: check if the game is over
+        """
+        return self.lost or self.won
+
+    def clone(self):
+        """
+        purpose: get an independent copy, constant time since the body is shared
+        """
+        if self.entered:
+            self.layers = (self.entered, self.layers)
+            self.depth += 1
+            self.entered = {}
+            if self.depth > MAX_LAYERS:
+                self.merge_layers()
+        state = object.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.entered = {}
+        return state
+
+    def restore(self, state) -> None:
+        """
+        purpose: roll this state back to an earlier clone of it, constant time
+        """
+        self.__dict__.update(state.clone().__dict__)
+
+    def merge_layers(self) -> None:
+        """
+        purpose: merge the frozen layers into one, dropping cells the tail has left, and trim the cell list
+        runs every MAX_LAYERS clones of a moving state, costs the length of the snake rather than the board
+        """
+        tail_moves = self.head_moves - self.length
+        merged = {}
+        layers = self.layers
+        while layers is not None:
+            layer, layers = layers
+            for cell, head_moves in layer.items():
+                if cell not in merged:
+                    merged[cell] = head_moves
+        self.layers = ({cell: head_moves for cell, head_moves in merged.items() if head_moves > tail_moves}, None)
+        self.depth = 1
+        body = self.get_body()
+        self.cells = None
+        for cell in reversed(body):
+            self.cells = (cell, self.cells)
+
+    def get_entered(self, cell: int) -> int:
+        """
+        purpose: get the head move a cell was last entered on, 0 if never
+        """
+        head_moves = self.entered.get(cell)
+        if head_moves is not None:
+            return head_moves
+        layers = self.layers
+        while layers is not None:
+            layer, layers = layers
+            head_moves = layer.get(cell)
+            if head_moves is not None:
+                return head_moves
+        return 0
+
+    def is_occupied(self, cell: int) -> bool:
+        """
+        purpose: check if a cell is under the snake
+        """
+        return self.get_entered(cell) > self.head_moves - self.length
+
+    def get_body(self) -> list:
+        """
+        purpose: get cell ids under the snake, head first
+        """
+        body = []
+        cells = self.cells
+        while len(body) < self.length:
+            cell, cells = cells
+            body.append(cell)
+        return body
+
+    def step(self, action=None) -> int:
+        """
+        purpose: move snake one tile, eat fruit and check for a win or loss, same rules as SnakeEngine.step
+        :param action: (x, y) direction to turn to, None or a reversal keeps the current direction
+        :return eaten: number of fruits eaten this step
+        """
+        # nothing moves once the game is over
+        if self.lost or self.won:
+            return 0
+
+        # update current direction, snake can't turn back on itself
+        direction = self.direction
+        if action is not None and action != direction:
+            if action not in SnakeEngine.DIRECTIONS:
+                raise ValueError(f'action must be one of {SnakeEngine.DIRECTIONS} or None, got {action}')
+            if action[0] != -direction[0] or action[1] != -direction[1]:
+                direction = self.direction = action
+
+        self.steps += 1
+
+        # check if snake off board
+        tile_count = self.tile_count
+        head_y, head_x = divmod(self.head, tile_count)
+        new_head_x = head_x + direction[0]
+        new_head_y = head_y + direction[1]
+        if not (0 <= new_head_x < tile_count and 0 <= new_head_y < tile_count):
+            self.loss_cause = 'wall'
+            self.lost = True
+            return 0
+
+        # check for collision before the body moves, tail tile still counts
+        new_head = new_head_y * tile_count + new_head_x
+        colliding = self.get_entered(new_head) > self.head_moves - self.length
+
+        # move head, the tail drops off by itself unless growing
+        if self.grow:
+            self.grow = False
+            self.length += 1
+        self.head_moves += 1
+        self.entered[new_head] = self.head_moves
+        self.cells = (new_head, self.cells)
+        self.head = new_head
+
+        if colliding:
+            self.loss_cause = 'collision'
+            self.lost = True
+            return 0
+
+        # eat fruit if snake on fruit
+        if new_head not in self.fruits:
+            return 0
+        self.score += 1
+        self.grow = True
+        self.spawn_fruit(self.fruits.index(new_head))
+        if not self.fruits:
+            self.won = True
+        return 1
+
+    def get_random(self, count: int) -> int:
+        """
+        purpose: draw a random int in [0, count) from a 64 bit linear congruential generator
+        """
+        self.random_state = (self.random_state * 6364136223846793005 + 1442695040888963407) & RANDOM_MASK
+        return ((self.random_state >> 32) * count) >> 32
+
+    def spawn_fruit(self, fruit_idx: int) -> None:
+        """
+        purpose: move a fruit to an open tile, removing it if there are none left
+        tries random tiles first, which almost always works unless the board is nearly full
+        """
+        cell_count = self.tile_count * self.tile_count
+        fruits = self.fruits
+        tile = None
+        if cell_count - self.length - len(fruits) + 1 > 0:  # eaten fruit is under the head
+            for _ in range(SPAWN_TRIES):
+                cell = self.get_random(cell_count)
+                if not self.is_occupied(cell) and cell not in fruits:
+                    tile = cell
+                    break
+            else:
+                tile = self.get_random_open_tile()
+
+        if tile is not None:
+            self.fruits = fruits[:fruit_idx] + (tile,) + fruits[fruit_idx + 1:]
+        else:  # no open tiles left, remove fruit
+            self.fruits = fruits[:fruit_idx] + fruits[fruit_idx + 1:]
+
+    def get_random_open_tile(self) -> int:
+        """
+        purpose: pick an open tile from the open tile index, call only when there is one
+        every tile open now was open, under the part of the body that has since dropped off or a fruit when
+        the index was built, picks among those are redrawn until one is still open, the index is rebuilt
+        from them once they get too crowded
+        """
+        fruits = self.fruits
+        open_tiles = self.open_tiles
+        if open_tiles is None:
+            candidates = range(self.tile_count * self.tile_count)
+        else:
+            dropped = min(self.head_moves - self.length - self.open_tail_moves, len(self.open_body))
+            candidate_count = len(open_tiles) + dropped + len(self.open_fruits)
+            for _ in range(SPAWN_TRIES):
+                idx = self.get_random(candidate_count)
+                if idx < len(open_tiles):
+                    cell = open_tiles.tiles[idx]
+                elif idx < len(open_tiles) + dropped:
+                    cell = self.open_body[idx - len(open_tiles)]
+                else:
+                    cell = self.open_fruits[idx - len(open_tiles) - dropped]
+                if not self.is_occupied(cell) and cell not in fruits:
+                    return cell
+            candidates = open_tiles.tiles + list(self.open_body[:dropped]) + list(self.open_fruits)
+
+        # no index yet or too many picks taken, rebuild it from the tiles that could be open
+        self.open_tiles = FreeTiles(cell for cell in candidates if not self.is_occupied(cell) and cell not in fruits)
+        self.open_body = tuple(reversed(self.get_body()))
+        self.open_fruits = tuple(fruit for fruit in fruits if not self.is_occupied(fruit))
+        self.open_tail_moves = self.head_moves - self.length
+        return self.open_tiles.tiles[self.get_random(len(self.open_tiles))]
+
+    def write_engine(self, engine: SnakeEngine) -> None:
+        """
+        purpose: put an engine in this state, e.g. to show or carry on a game found by search
+        the engine keeps its own random state for later fruit spawns
+        """
+        engine.body = deque(self.get_body())
+        engine.occupied = set(engine.body)
+        engine.direction = self.direction
+        engine.grow = self.grow
+        engine.fruits = list(self.fruits)
+        engine.score = self.score
+        engine.steps = self.steps
+        engine.lost = self.lost
+        engine.won = self.won
+        engine.loss_cause = self.loss_cause
+        taken = engine.occupied.union(engine.fruits)
+        engine.free_tiles = FreeTiles(cell for cell in range(self.tile_count * self.tile_count) if cell not in taken)
+
+
+# --- test ---
+if __name__ == "__main__":
+    import time
+    from random import Random
+
+    # states play exactly like the engine while no fruit spawns
+    player = Random(0)
+    for seed in range(200):
+        engine = SnakeEngine(tile_count=10, fruit_count=3, seed=seed)
+        state = GameState(engine)
+        while not engine.done:
+            action = player.choice(SnakeEngine.DIRECTIONS)
+            eaten = engine.step(action)
+            assert state.step(action) == eaten
+            assert (state.score, state.steps, state.loss_cause) == (engine.score, engine.steps, engine.loss_cause)
+            # a colliding head is on the body twice in the engine, once here
+            assert engine.loss_cause == 'collision' or state.get_body() == list(engine.body)
+            if eaten:
+                state = GameState(engine, seed)
+    print('states match the engine')
+
+    # flat monte carlo search, random playouts from a clone of the state for each move
+    directions = SnakeEngine.DIRECTIONS
+    random_idx = Random(1).randrange
+    engine = SnakeEngine(tile_count=17, fruit_count=1, seed=0)
+    root = GameState(engine, seed=1)
+    playout_depth = 20
+    simulations = 0
+    start = time.perf_counter()
+    while not root.done and root.steps < 200:
+        scores = []
+        for action in directions:
+            total = 0
+            for _ in range(25):
+                state = root.clone()
+                state.step(action)
+                for _ in range(playout_depth):
+                    if state.done:
+                        break
+                    state.step(directions[random_idx(4)])
+                    simulations += 1
+                total += state.score - 10 * state.lost
+            scores.append(total)
+        root.step(directions[scores.index(max(scores))])
+    elapsed = time.perf_counter() - start
+    root.write_engine(engine)
+    print(f'search reached score {engine.score} in {engine.steps} steps, '
+          f'{simulations / elapsed:.0f} simulated steps/s')
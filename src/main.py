@@ -11,20 +11,38 @@ __status__ = "Production"
 
 
 # --- imports ---
+import time
+IMPORT_START = time.perf_counter()  # cold start report counts from here, before every other import
+
+import argparse
+from collections import deque
+from random import Random
+
 import pygame
 from pygame.math import Vector2
-from random import randint
-from pygame import mixer
 
+from src.assets import asset_manager
+from src.engine.autopilot import Autopilot
+from src.engine.engine import SnakeEngine
+from src.engine.replay import Replay, ReplayRecorder
 from src.panels.board import Board
 from src.panels.score_panel import ScorePanel
 from src.panels.pause_menu import PauseMenu
+from src.profiler import Profiler
 from src.sprites.snake import Snake
 from src.sprites.fruit import Fruit
 
 
-# --- funcs ---
-# N/A
+# --- constants ---
+TURN_KEYS = {pygame.K_w: SnakeEngine.UP,  # key -> direction
+             pygame.K_a: SnakeEngine.LEFT,
+             pygame.K_s: SnakeEngine.DOWN,
+             pygame.K_d: SnakeEngine.RIGHT}
+STARTUP_IMAGES = ('./img/fruit/peach.png',  # biggest and needed first, by the score panel
+                  './img/snake1/head.png',
+                  './img/snake1/body.png',
+                  './img/snake1/l.png',
+                  './img/snake1/tail.png')
 
 
 # --- classes ---
@@ -34,14 +52,26 @@ class SnakeGame:
     """
     def __init__(self,
                  fruit_count: int,
-                 tile_count: int):
-        # initialize pygame
+                 tile_count: int,
+                 step_delay: float = 0.18,
+                 replay: Replay = None,
+                 screen_size: tuple = (600, 675),
+                 autopilot: bool = False,
+                 startup_report: bool = False):
+        # startup stage -> seconds since IMPORT_START
+        self.startup_report = startup_report
+        self.startup_times = {'imports': time.perf_counter() - IMPORT_START}
+
+        # initialize pygame, only the modules drawing needs, audio starts on first use in init_audio
         print('starting pygame...')
-        pygame.init()
-        pygame.mixer.init()
+        pygame.display.init()
+        pygame.font.init()
 
         # create screen
-        self.screen = pygame.display.set_mode((600, 675))
+        self.screen = pygame.display.set_mode(screen_size)
+
+        # decode images while the first frame shows, the sprites needing them are built after it
+        asset_manager.preload(STARTUP_IMAGES)
 
         # various panels
         board_length = int(self.screen.get_width() * 0.9)
@@ -53,77 +83,192 @@ class SnakeGame:
                                             self.screen.get_height() - border_size))
         self.board.position_on = 'midbottom'  # position based on midbottom of board
 
-        # pause menu
-        self.pause_menu = PauseMenu(size=Vector2(self.screen.get_width() * 0.5, self.screen.get_height() * 0.7),
-                                    position=Vector2(self.screen.get_rect().center[0], self.screen.get_rect().center[0]),
-                                    color=(200, 200, 200))
+        # pause menu and score panel, built on first use and in load_sprites
+        self.built_pause_menu = None
+        self.pause_menu_shown = False  # pause menu on screen and up to date, the loop sleeps until an event
+        self.score_panel_size = Vector2(self.screen.get_width(),
+                                        self.screen.get_height() - board_length - border_size * 2)
+        self.score_panel = None
+
+        # headless game rules, drawn by the sprites below
+        self.engine = SnakeEngine(tile_count, fruit_count)
+
+        # replays, every game is recorded and a replay can be watched instead of playing
+        self.replay = replay  # replay being watched, None when playing
+        self.seed_random = Random()  # fruit seed of each game
+        self.recorder = None  # records the current game
+        self.last_replay = None  # replay of the last game lost
+        self.seek_steps = 50  # steps skipped by seeking
+
+        # turns from key presses, one is applied per snake move so quick taps between moves aren't lost
+        self.turns = deque(maxlen=3)
+
+        # bot steering the snake instead of the player, toggled with F6
+        self.autopilot = Autopilot(self.engine) if autopilot else None
+
+        # main game objects, built in load_sprites once their images are decoded
+        self.fruit_count = fruit_count
+        self.snake = None
+        self.fruits = pygame.sprite.Group()
+
+        # basic game attributes
+        self.paused = False
+        self.running = True  # tracks if game should keep running
+        self.debug = True  # show debug info over the score panel
+
+        # dirty rectangle rendering
+        self.full_redraw = True  # redraw whole screen on next frame
+        self.dirty_cells = set()  # board cells drawn on last frame that may change
+        self.drawn_score = None  # score shown on the score panel
+        self.debug_rects = []  # screen rectangles covered by debug info last frame
+        self.background_color = (0, 100, 0)
+
+        # time
+        self.frame_rate = 120  # max frames per second
+        self.step_delay = step_delay  # seconds between snake moves, None to move once per frame with no frame cap
+        self.max_frame_time = 0.25  # most time simulated per frame, so a hang doesn't cause a burst of moves
+        self.step_time = 0  # time waiting for the next snake move
+        self.speed = 1  # replay fast forward multiplier
+
+        # per frame stage timings, toggled with F3, exported with F4
+        self.profiler = Profiler()
+        for owner, method_name in ((self, 'handle_events'),
+                                   (self, 'simulate'),
+                                   (self, 'update_objects'),
+                                   (self, 'draw_scene'),
+                                   (self, 'show_debug_info'),
+                                   (self, 'draw_board'),
+                                   (self.board, 'draw'),
+                                   (self.board, 'show'),
+                                   (self.board, 'restore_cells')):
+            self.profiler.add_stage(owner, method_name)
+        self.profiler.add_stage(self.fruits, 'update', 'fruits.update')
+        self.profiler.add_stage(self.fruits, 'draw', 'fruits.draw')
+        self.profiler.add_stage(pygame.display, 'update', 'display.update')
+        self.profiler_rect = pygame.Rect(self.screen.get_width() - 265, 3, 260, 245)  # top right corner
+        self.startup_times['game built'] = time.perf_counter() - IMPORT_START
+
+    @property
+    def pause_menu(self) -> PauseMenu:
+        """
+        purpose: get the pause menu, building it the first time the game pauses
+        """
+        if self.built_pause_menu is None:
+            self.built_pause_menu = PauseMenu(size=Vector2(self.screen.get_width() * 0.5,
+                                                           self.screen.get_height() * 0.7),
+                                              position=Vector2(self.screen.get_rect().center[0],
+                                                               self.screen.get_rect().center[0]),
+                                              color=(200, 200, 200))
+            self.profiler.add_stage(self.built_pause_menu, 'draw')
+            self.profiler.add_stage(self.built_pause_menu, 'show')
+        return self.built_pause_menu
+
+    def draw_first_frame(self) -> None:
+        """
+        purpose: show the background and empty board straight away, before any sprite is loaded
+        """
+        self.screen.fill(self.background_color)
+        self.board.draw()
+        self.board.show(self.screen)
+        pygame.display.update()
+        self.startup_times['first frame'] = time.perf_counter() - IMPORT_START
 
+    def load_sprites(self) -> None:
+        """
+        purpose: build the score panel and sprites once their images are decoded, then start the first game
+        """
         # center score panel along the top
-        self.score_panel = ScorePanel(size=Vector2(self.screen.get_width(),
-                                                   self.screen.get_height() - board_length - border_size * 2),
+        self.score_panel = ScorePanel(size=self.score_panel_size,
                                       position=Vector2(0, 0),
                                       color=(0, 50, 0))
         self.score_panel.position_on = 'topleft'
 
-        # main game objects
-        self.snake_starting_position = [Vector2(3, self.board.tile_count/2+0.5),
-                                        Vector2(2, self.board.tile_count/2+0.5),
-                                        Vector2(1, self.board.tile_count/2+0.5)]  # to reset to on loss
-        self.snake_starting_direction = Vector2(1, 0)
         self.snake = Snake(self.board.tile_size,
-                           self.snake_starting_position,
-                           self.snake_starting_direction)
-        self.fruits = pygame.sprite.Group()
+                           self.engine)
         # add specified number of fruits
-        for i in range(fruit_count):
+        for i in range(self.fruit_count):
             self.fruits.add(Fruit(self.board.tile_size * 1.1,
                                   './img/fruit/peach.png'))
 
-        # basic game attributes
-        self.paused = False
-        self.running = True  # tracks if game should keep running
-
-        # time
-        self.loop_delay = 50
-        self.update_objects_delay = 20
-
-        # events
-        self.update_objects_event = pygame.USEREVENT
-        pygame.time.set_timer(self.update_objects_event, self.update_objects_delay)
+        for owner, method_name in ((self.score_panel, 'draw'),
+                                   (self.score_panel, 'show'),
+                                   (self.snake, 'draw'),
+                                   (self.snake, 'draw_cells')):
+            self.profiler.add_stage(owner, method_name)
 
         # initialize game
         self.init_game()
+        self.startup_times['sprites loaded'] = time.perf_counter() - IMPORT_START
+
+    def init_audio(self) -> None:
+        """
+        purpose: start the mixer, opening the audio device can be slow so it waits until sound is needed
+        """
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+
+    def report_startup(self) -> None:
+        """
+        purpose: print how long each startup stage took to finish
+        importing pygame takes about 250ms on its own, since it loads numpy and pkg_resources up front,
+        so the first frame can't come in under 200ms however little the game does before it
+        """
+        print('cold start, ms since imports began:')
+        for stage, seconds in self.startup_times.items():
+            print(f'  {stage}: {seconds * 1000:.1f}')
 
     def run(self):
         """
         purpose: run main game loop
         """
+        # show something before loading the rest
+        self.draw_first_frame()
+        self.load_sprites()
+        if self.startup_report:
+            self.report_startup()
+
         # create pygame clock to set game tick
         clock = pygame.time.Clock()
 
         # play background music loop
-        # mixer.music.load('./sound/walking.wav')
-        # mixer.music.play(-1)
+        # self.init_audio()
+        # pygame.mixer.music.load('./sound/walking.wav')
+        # pygame.mixer.music.play(-1)
 
         # execute continuous game loop
         while self.running:
+            # while paused with nothing to redraw, sleep until something happens instead of spinning
+            waited_event = None
+            if self.paused and self.pause_menu_shown:
+                waited_event = pygame.event.wait()
+                # time spent waiting isn't frame time
+                clock.tick()
+                self.profiler.frame_start = None
+
             # delay between loops so that game doesnt run too fast
-            clock.tick(120)
+            if self.step_delay is None:
+                frame_time = clock.tick() / 1000
+            else:
+                frame_time = clock.tick(self.frame_rate) / 1000
 
-            # draw scene
-            self.draw_scene()
+            # respond to events, including turns
+            self.handle_events(waited_event)
 
-            # get input
-            self.get_input()
+            # move snake at a fixed rate no matter the frame rate
+            self.simulate(frame_time)
 
-            # respond to events, includes moving snake and checking various conditions
-            self.handle_events()
+            # draw scene
+            self.draw_scene()
 
             # check for win
-            if not self.fruits:
+            if self.engine.won:
                 self.paused = True
                 print('you win!')
 
+            # close profiler frame
+            if self.profiler.enabled:
+                self.profiler.end_frame()
+
         # end game if loop is exited
         print('exiting game...')
         pygame.quit()
@@ -132,8 +277,13 @@ class SnakeGame:
         """
         purpose: set game in initial state
         """
-        for fruit in self.fruits:
-            self.spawn_fruit(fruit)
+        self.engine.reset(self.seed_random.randrange(2 ** 32) if self.replay is None else self.replay.seed)
+        self.recorder = ReplayRecorder(self.engine)
+        self.turns.clear()
+        self.snake.sync()
+        self.sync_fruits()
+        self.score_panel.score = self.engine.score
+        self.full_redraw = True
 
     def draw_scene(self) -> None:
         """
@@ -141,8 +291,16 @@ class SnakeGame:
         """
         # branch between pause menu and running game
         if self.paused:
-            self.pause_menu.draw()
-            self.pause_menu.show(self.screen)
+            # pause menu covers the board, redraw everything once unpaused
+            self.full_redraw = True
+            # show the menu when it opens and when a button changes, it draws itself only if it changed
+            if not self.pause_menu_shown:
+                self.pause_menu.set_hover(pygame.mouse.get_pos())
+            if not self.pause_menu_shown or self.pause_menu.dirty:
+                self.pause_menu.draw()
+                self.pause_menu.show(self.screen)
+                pygame.display.update(self.pause_menu.surface_rect)
+                self.pause_menu_shown = True
             # handle continue
             if self.pause_menu.continue_button.pressed:
                 # reset continue button for next click
@@ -156,161 +314,330 @@ class SnakeGame:
                 # cycle game pause state
                 self.running = False
         else:
-            self.draw_scene_running()
+            self.pause_menu_shown = False
+            dirty_rects = self.draw_scene_running()
             # debug data
-            self.show_debug_info()
-
-        # update screen
-        pygame.display.update()
+            if self.debug:
+                self.debug_rects = self.show_debug_info()
+                if dirty_rects is not None:
+                    dirty_rects.extend(self.debug_rects)
+            # frame time overlay
+            if self.profiler.enabled:
+                overlay_rect = self.profiler.draw_overlay(self.screen, self.profiler_rect)
+                if dirty_rects is not None:
+                    dirty_rects.append(overlay_rect)
+
+            # update changed parts of the screen
+            if dirty_rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(dirty_rects)
 
     def draw_scene_running(self):
         """
         purpose: draw the scene when the game is running
+        :return dirty_rects: screen rectangles that changed, None if the whole screen changed
+        """
+        # cells that can change before the next frame
+        dirty_cells = self.get_dirty_cells()
+        view_moved = self.update_view()
+
+        if self.full_redraw:
+            # fill background
+            self.screen.fill(self.background_color)  # color background green
+
+            # draw objects
+            self.score_panel.draw()
+            self.draw_board()
+
+            # show panels
+            self.score_panel.show(self.screen)
+            self.board.show(self.screen)
+
+            self.full_redraw = False
+            self.dirty_cells = dirty_cells
+            self.debug_rects = []
+            self.drawn_score = self.score_panel.score
+            return None
+
+        # clear last frame's debug info
+        dirty_rects = []
+        for debug_rect in self.debug_rects:
+            self.screen.fill(self.background_color, debug_rect)
+            dirty_rects.append(debug_rect)
+        self.debug_rects = []
+
+        if view_moved:
+            # everything on a scrolling board shifted, redraw the view
+            self.draw_board()
+            self.board.show(self.screen)
+            dirty_rects.append(self.board.surface_rect)
+        else:
+            # redraw cells that changed since last frame or may change now
+            cells = dirty_cells | self.dirty_cells
+            board_rects = self.board.restore_cells(cells)
+            self.snake.draw_cells(self.board.surface, cells)
+            self.fruits.update(self.board.tile_size, self.board.view_x, self.board.view_y)
+            self.fruits.draw(self.board.surface)
+
+            # copy redrawn cells to the screen
+            for board_rect in board_rects:
+                screen_rect = board_rect.move(self.board.surface_rect.topleft)
+                self.screen.blit(self.board.surface, screen_rect, board_rect)
+                dirty_rects.append(screen_rect)
+        self.dirty_cells = dirty_cells
+
+        # score panel only changes with the score, debug info and profiler overlay are drawn over it every frame
+        if self.debug or self.profiler.enabled or self.score_panel.score != self.drawn_score:
+            self.score_panel.draw()
+            self.score_panel.show(self.screen)
+            dirty_rects.append(self.score_panel.surface_rect)
+            self.drawn_score = self.score_panel.score
+
+        return dirty_rects
+
+    def draw_board(self) -> None:
+        """
+        purpose: draw the board with the snake and fruits on it, only what is in view on a scrolling board
         """
-        # fill background
-        self.screen.fill((0, 100, 0))  # color background green
-
-        # draw objects
-        self.score_panel.draw()
         self.board.draw()
-        self.snake.draw(self.board.surface)
+        if self.board.scrolling:
+            self.snake.draw_cells(self.board.surface, self.board.get_visible_cells())
+        else:
+            self.snake.draw(self.board.surface)
+        self.fruits.update(self.board.tile_size, self.board.view_x, self.board.view_y)  # place before drawing
         self.fruits.draw(self.board.surface)
-        self.fruits.update(self.board.tile_size)
 
-        # show panels
-        self.score_panel.show(self.screen)
-        self.board.show(self.screen)
-
-    def get_input(self) -> None:
+    def update_view(self) -> bool:
         """
-        purpose: get player input
+        purpose: keep a scrolling board's view centered on the snake head as it slithers
+        :return moved: True if the view moved since the last frame
         """
-        # get keys pressed
-        keys = pygame.key.get_pressed()
-
-        # update snake direction based on wsad
-        if keys[pygame.K_w] and self.snake.direction.y == 0:
-            self.snake.next_direction = Vector2(0, -1)
-        elif keys[pygame.K_a] and self.snake.direction.x == 0:
-            self.snake.next_direction = Vector2(-1, 0)
-        elif keys[pygame.K_s] and self.snake.direction.y == 0:
-            self.snake.next_direction = Vector2(0, 1)
-        elif keys[pygame.K_d] and self.snake.direction.x == 0:
-            self.snake.next_direction = Vector2(1, 0)
-
-    def update_objects(self) -> None:
+        if not self.board.scrolling:
+            return False
+        x, y = self.engine.get_position(self.engine.head)
+        direction_x, direction_y = self.engine.direction
+        moved = self.board.follow((x + 0.5 + direction_x * self.snake.offset) * self.board.tile_size,
+                                  (y + 0.5 + direction_y * self.snake.offset) * self.board.tile_size)
+        self.snake.view_x = self.board.view_x
+        self.snake.view_y = self.board.view_y
+        return moved
+
+    def get_dirty_cells(self) -> set:
         """
-        purpose: update objects on screen
+        purpose: get board cells whose drawing can change, snake ends and the tiles around each fruit
         """
-        # game updates
-        self.snake.move()
-        # eat fruit if snake on fruit
+        cells = self.snake.get_dirty_cells()
+        tile_count = self.engine.tile_count
         for fruit in self.fruits:
-            if self.snake.segment_positions[0] == fruit.position:
-                self.score_panel.score += 1
-
-                # move fruit
-                self.spawn_fruit(fruit)
+            # pulsing fruit spills onto the surrounding tiles
+            fruit_cell = self.engine.get_cell(int(fruit.position.x), int(fruit.position.y))
+            for row_offset in (-tile_count, 0, tile_count):
+                for column_offset in (-1, 0, 1):
+                    cells.add(fruit_cell + row_offset + column_offset)
+        return cells
+
+    def queue_turn(self, direction: tuple) -> None:
+        """
+        purpose: queue a turn for a later snake move, ignoring ones that don't change the direction before it
+        a full queue drops the oldest turn, so the latest key presses win
+        """
+        last_direction = self.turns[-1] if self.turns else self.engine.direction
+        if direction[0] != last_direction[0] and direction[1] != last_direction[1]:  # a 90 degree turn
+            self.turns.append(direction)
 
-                # queue snake growth on next move
-                self.snake.grow = True
+    def simulate(self, frame_time: float) -> None:
+        """
+        purpose: run every snake move due since the last frame, then interpolate the snake between moves
+        slow frames run several moves at once instead of slowing the game down
+        :param frame_time: seconds since the last frame
+        """
+        if self.paused:
+            self.step_time = 0
+            return
+
+        # as fast as possible, one move per frame
+        if self.step_delay is None:
+            self.update_objects()
+            self.snake.interpolate(0)
+            return
+
+        # fixed time step
+        step_delay = self.step_delay / self.speed
+        self.step_time += min(frame_time, self.max_frame_time)
+        while self.step_time >= step_delay and not self.paused:
+            self.step_time -= step_delay
+            self.update_objects()
+        self.snake.interpolate(self.step_time / step_delay)
 
-        # check for loss
-        if any([self.snake.colliding,  # check if snake is self colliding
-                # check if snake off board
-                self.snake.segment_positions[0].x < 0,
-                self.snake.segment_positions[0].y < 0,
-                self.snake.segment_positions[0].x > self.board.tile_count - 1,
-                self.snake.segment_positions[0].y > self.board.tile_count - 1
-                ]):
-            print('you lose!')
-            # reset snake
-            self.snake.segment_positions = self.snake_starting_position
-            self.snake.direction = Vector2(1, 0)
-            self.snake.next_direction = Vector2(1, 0)
-            self.snake.grow = True
-            # reset score
-            self.score_panel.score = 0
-            # pause game
+    def update_objects(self) -> None:
+        """
+        purpose: update objects on screen, moving the snake one tile
+        """
+        # replay turns instead of player input
+        if self.replay is not None:
+            action = self.replay.get_action(self.engine.steps + 1)
+            self.snake.next_direction = Vector2(self.engine.direction if action is None else action)
+        elif self.autopilot is not None:
+            action = self.autopilot.get_action()
+            if action is not None:
+                self.snake.next_direction = Vector2(action)
+        elif self.turns:
+            self.snake.next_direction = Vector2(self.turns.popleft())
+
+        # game updates, eating fruit is handled by the engine
+        if self.snake.move():
+            self.score_panel.score = self.engine.score
+            self.sync_fruits()
+        self.recorder.observe()
+
+        # stop at the end of a replay cut off before the game ended
+        if self.replay is not None and self.engine.steps >= self.replay.steps and not self.engine.done:
+            print('replay finished')
             self.paused = True
 
-    def handle_events(self) -> None:
+        # check for loss
+        if self.engine.lost:
+            print(f'you lose! ({self.engine.loss_cause})')
+            self.last_replay = self.recorder.get_replay()
+            # reset snake, score and fruit
+            self.init_game()
+            self.snake.next_direction = Vector2(self.engine.direction)
+            # pause game, the autopilot plays on for soak testing
+            self.paused = self.autopilot is None
+
+    def handle_events(self, waited_event: pygame.event.Event = None) -> None:
         """
         purpose: high left logic for responding to events
+        :param waited_event: event already taken off the queue by pygame.event.wait, handled first
         """
+        events = pygame.event.get()
+        if waited_event is not None:
+            events.insert(0, waited_event)
+
         # search events for items to respond to
-        for event in pygame.event.get():
+        for event in events:
             # handle game quit
             if event.type == pygame.QUIT:
                 print('close button clicked')
                 self.running = False  # exit loop
 
-            # move snake slower than once/loop
-            if event.type == self.update_objects_event and not self.paused:
-                self.update_objects()
+            # window uncovered, show the screen again without redrawing it
+            if event.type == pygame.VIDEOEXPOSE:
+                pygame.display.update()
+
+            # pause menu buttons
+            if self.paused and self.pause_menu_shown:
+                self.pause_menu.handle_event(event)
+
+            # queue player turns, the replay or autopilot steers instead when on
+            if (event.type == pygame.KEYDOWN and event.key in TURN_KEYS
+                    and self.replay is None and self.autopilot is None):
+                self.queue_turn(TURN_KEYS[event.key])
 
             # handle game pause
             if event.type == pygame.KEYUP:
                 if event.key == pygame.K_ESCAPE:
                     self.paused = not self.paused
-
-    def get_open_tiles(self) -> [Vector2]:
+                # toggle profiler overlay, redraw to clear it
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                    self.full_redraw = True
+                # save profiled frames for chrome://tracing
+                elif event.key == pygame.K_F4:
+                    trace_fl = f'trace_{time.strftime("%Y%m%d_%H%M%S")}.json'
+                    self.profiler.export_chrome_trace(trace_fl)
+                    print(f'saved profiler trace to {trace_fl}')
+                # save current game, or the last one lost if the current game hasn't started
+                elif event.key == pygame.K_F5:
+                    replay = self.recorder.get_replay() if self.replay is None else self.replay
+                    if not replay.steps and self.last_replay is not None:
+                        replay = self.last_replay
+                    replay_fl = f'replay_{time.strftime("%Y%m%d_%H%M%S")}.snr'
+                    replay.save(replay_fl)
+                    print(f'saved replay to {replay_fl}')
+                # let the bot play
+                elif event.key == pygame.K_F6 and self.replay is None:
+                    self.autopilot = Autopilot(self.engine) if self.autopilot is None else None
+                    print(f'autopilot {"on" if self.autopilot is not None else "off"}')
+                # replay seek and fast forward
+                elif self.replay is not None:
+                    if event.key == pygame.K_RIGHT:
+                        self.seek(self.engine.steps + self.seek_steps)
+                    elif event.key == pygame.K_LEFT:
+                        self.seek(self.engine.steps - self.seek_steps)
+                    elif event.key == pygame.K_UP:
+                        self.speed = min(self.speed * 2, 64)
+                    elif event.key == pygame.K_DOWN:
+                        self.speed = max(self.speed // 2, 1)
+
+    def seek(self, step: int) -> None:
         """
-        purpose: get a list of vectors for the open tiles
+        purpose: jump the watched replay to a step by replaying it headlessly from the start
         """
-        # find new tile for fruit
-        open_tiles = self.board.tiles[:]
-        # remove tiles with the snake
-        for segment_position in self.snake.segment_positions:
-            try:
-                open_tiles.remove(segment_position)
-            except ValueError:  # tile already removed from open tiles
-                pass
-        # remove tiles with a fruit
-        for fruit in self.fruits:
-            try:
-                open_tiles.remove(fruit.position)
-            except ValueError:  # tile already removed from open tiles
-                pass
-
-        return open_tiles
-
-    def spawn_fruit(self, fruit) -> None:
+        self.replay.simulate(self.engine, max(0, step))
+        self.recorder = ReplayRecorder(self.engine)  # F5 saves the watched replay, not this recording
+        self.snake.sync()
+        self.snake.next_direction = Vector2(self.engine.direction)
+        self.sync_fruits()
+        self.score_panel.score = self.engine.score
+        self.step_time = 0
+        self.full_redraw = True
+
+    def sync_fruits(self) -> None:
         """
-        purpose: place a fruit on a open tile
+        purpose: move fruit sprites to the engine fruit positions, removing any that were eaten for good
         """
-        open_tiles = self.get_open_tiles()
-        open_tile_count = len(open_tiles)
-        if open_tile_count >= 1:
-            tile_idx = randint(0, open_tile_count - 1)
-            fruit.position = open_tiles[tile_idx]
-        else:  # no open tiles left, remove fruit
+        fruits = self.fruits.sprites()
+        for fruit, cell in zip(fruits, self.engine.fruits):
+            fruit.position = Vector2(self.engine.get_position(cell))
+        # no open tiles left, remove fruit
+        for fruit in fruits[len(self.engine.fruits):]:
             print('no open tiles left, removing fruit')
             self.fruits.remove(fruit)
 
-    def show_debug_info(self):
+    def show_debug_info(self) -> list:
         """
         purpose: add stats for debugging
+        :return text_rects: screen rectangles the stats were drawn to
         """
         font_size = 15
-        font = pygame.font.Font('freesansbold.ttf', font_size)
-        data = {'position': self.snake.segment_positions[0:2],
-                'head offset': self.snake.offset,
+        body = self.engine.body
+        data = {'position': [Vector2(self.engine.get_position(cell)) for cell in (body[0], body[1])],
+                'head offset': f'{self.snake.offset:.2f}',  # rounded so lines repeat and hit the text cache
                 'next direction': self.snake.next_direction,
-                'tail position': self.snake.segment_positions[-2:],
+                'tail position': [Vector2(self.engine.get_position(cell)) for cell in (body[-2], body[-1])],
                 'snake colliding?': self.snake.colliding
                 }
         idx = 0
+        text_rects = []
         for label, value in data.items():
-            text = font.render(f'{label}: {value}', True, (255, 255, 255))
+            text = asset_manager.get_text('freesansbold.ttf', font_size, f'{label}: {value}', (255, 255, 255))
             text_rect = text.get_rect()
             text_rect.y += idx * font_size
             self.screen.blit(text, text_rect)
+            text_rects.append(text_rect)
             idx += 1
+        return text_rects
 
 
 # --- main ---
 if __name__ == "__main__":
-    SG = SnakeGame(fruit_count=1,
-                   tile_count=17)
+    parser = argparse.ArgumentParser(description='play snake')
+    parser.add_argument('--replay', help='replay saved with F5 to watch, left/right seek and up/down change speed')
+    parser.add_argument('--autopilot', action='store_true', help='let a bot play, toggled in game with F6')
+    parser.add_argument('--startup-report', action='store_true', help='print how long startup took')
+    args = parser.parse_args()
+
+    if args.replay:
+        replay = Replay.load(args.replay)
+        SG = SnakeGame(fruit_count=replay.fruit_count,
+                       tile_count=replay.tile_count,
+                       replay=replay,
+                       startup_report=args.startup_report)
+    else:
+        SG = SnakeGame(fruit_count=1,
+                       tile_count=17,
+                       autopilot=args.autopilot,
+                       startup_report=args.startup_report)
     SG.run()
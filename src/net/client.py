@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""client.py: headless test client for the multiplayer server, plays with a simple bot"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import argparse
+import asyncio
+from random import Random
+
+from src.engine.engine import SnakeEngine
+from src.net import protocol
+
+
+# --- classes ---
+class SnakeClient:
+    """
+    purpose: connect to a room and keep a copy of its state
+    """
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.snake_id = None
+        self.tick_rate = None
+        self.state = None  # protocol.ClientState once joined
+        self.bytes_received = 0
+
+    async def connect(self, host: str,
+                      port: int,
+                      room: str = '') -> None:
+        """
+        purpose: join a room, room '' joins any room with space
+        """
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(protocol.pack(protocol.JOIN, room.encode()))
+
+        message_type, payload = await protocol.read_message(self.reader)
+        if message_type == protocol.ERROR:
+            raise ConnectionError(payload.decode())
+        if message_type != protocol.WELCOME:
+            raise ConnectionError(f'expected a welcome message, got type {message_type}')
+        self.snake_id, tile_count, _, self.tick_rate = protocol.WELCOME_FORMAT.unpack(payload)
+        self.state = protocol.ClientState(tile_count)
+
+    async def receive(self) -> int:
+        """
+        purpose: apply the next message from the server
+        :return message_type: type of message applied, None once disconnected
+        """
+        message_type, payload = await protocol.read_message(self.reader)
+        if message_type is None:
+            return None
+        self.bytes_received += protocol.HEADER.size + len(payload)
+        if message_type == protocol.STATE:
+            self.state.apply_state(payload)
+        elif message_type == protocol.TICK:
+            self.state.apply_tick(payload)
+        elif message_type == protocol.ERROR:
+            raise ConnectionError(payload.decode())
+        return message_type
+
+    def turn(self, direction_idx: int) -> None:
+        """
+        purpose: ask the server to turn our snake on the next tick
+        """
+        self.writer.write(protocol.pack(protocol.TURN, bytes((direction_idx,))))
+
+    def close(self) -> None:
+        """
+        purpose: leave the room
+        """
+        if self.writer is not None:
+            self.writer.close()
+
+
+# --- funcs ---
+def choose_turn(state: protocol.ClientState, snake_id: int, rng: Random):
+    """
+    purpose: pick a direction that doesn't hit a wall or a snake next tick, going straight when it can
+    :return direction_idx: index into SnakeEngine.DIRECTIONS, None to keep going straight or if dead
+    """
+    snake = state.snakes.get(snake_id)
+    if snake is None or not snake[0]:
+        return None
+    body = snake[2]
+    tile_count = state.tile_count
+    head_y, head_x = divmod(body[0], tile_count)
+    occupied = {cell for _, _, other_body in state.snakes.values() for cell in other_body}
+
+    # current direction from the neck, unknown for a snake one tile long
+    straight = None
+    if len(body) > 1:
+        neck_y, neck_x = divmod(body[1], tile_count)
+        straight = SnakeEngine.DIRECTIONS.index((head_x - neck_x, head_y - neck_y))
+
+    safe = []
+    for direction_idx, (x, y) in enumerate(SnakeEngine.DIRECTIONS):
+        if straight is not None and direction_idx == (straight + 2) % 4:
+            continue
+        new_x, new_y = head_x + x, head_y + y
+        if 0 <= new_x < tile_count and 0 <= new_y < tile_count and new_y * tile_count + new_x not in occupied:
+            safe.append(direction_idx)
+    if straight in safe and rng.random() < 0.8:
+        return None
+    return rng.choice(safe) if safe else None
+
+
+async def play(host: str, port: int, room: str, ticks: int) -> None:
+    """
+    purpose: play a bot in a room for a number of ticks, printing its score
+    """
+    client = SnakeClient()
+    await client.connect(host, port, room)
+    print(f'joined as snake {client.snake_id} at {client.tick_rate} ticks/s')
+    rng = Random(client.snake_id)
+    tick_count = 0
+    best_score = 0
+    try:
+        while tick_count < ticks:
+            message_type = await client.receive()
+            if message_type is None:
+                print('server closed the connection')
+                break
+            if message_type != protocol.TICK:
+                continue
+            tick_count += 1
+            direction_idx = choose_turn(client.state, client.snake_id, rng)
+            if direction_idx is not None:
+                client.turn(direction_idx)
+            snake = client.state.snakes.get(client.snake_id)
+            if snake is not None:
+                best_score = max(best_score, snake[1])
+    finally:
+        client.close()
+    print(f'{tick_count} ticks, best score {best_score}, '
+          f'{client.bytes_received / max(tick_count, 1):.0f} bytes/tick received')
+
+
+# --- main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='headless bot client for the multiplayer snake server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--room', default='', help='room to join, any room with space if empty')
+    parser.add_argument('--ticks', type=int, default=300, help='ticks to play before leaving')
+    args = parser.parse_args()
+
+    asyncio.run(play(args.host, args.port, args.room, args.ticks))
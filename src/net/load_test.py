@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""load_test.py: fill a multiplayer server with bot clients and measure tick delivery latency"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import argparse
+import asyncio
+import resource
+import subprocess
+import sys
+import time
+from random import Random
+
+from src.net import protocol
+from src.net.client import SnakeClient
+
+
+# --- funcs ---
+async def run_bot(host: str,
+                  port: int,
+                  room: str,
+                  duration: float,
+                  apply_ticks: bool,
+                  rng: Random,
+                  results: list) -> None:
+    """
+    purpose: play random turns until duration is up, recording when each tick arrives
+    cheap random turns keep the load on the server rather than on this process
+    :param apply_ticks: keep the client state up to date, catches broken deltas at some cost
+    """
+    client = SnakeClient()
+    await client.connect(host, port, room)
+    if not apply_ticks:
+        # only read the tick number
+        def apply_tick(payload: bytes, state=client.state) -> None:
+            state.tick = protocol.TICK_HEADER.unpack_from(payload)[0]
+        client.state.apply_tick = apply_tick
+    arrivals = []  # (tick, arrival time)
+    end = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < end:
+            message_type = await client.receive()
+            if message_type is None:
+                break
+            if message_type == protocol.TICK:
+                arrivals.append((client.state.tick, time.perf_counter()))
+                if rng.random() < 0.2:
+                    client.turn(rng.randrange(4))
+    finally:
+        client.close()
+    results.append((client.tick_rate, arrivals, client.bytes_received))
+
+
+def get_lateness(tick_rate: float, arrivals: list) -> list:
+    """
+    purpose: get how late each tick arrived, relative to the earliest arriving tick
+    ticks are due every 1 / tick_rate seconds, so a tick on time arrives tick / tick_rate after the first
+    """
+    tick_time = 1 / tick_rate
+    offsets = [arrival - tick * tick_time for tick, arrival in arrivals]
+    if not offsets:
+        return []
+    best_offset = min(offsets)
+    return [offset - best_offset for offset in offsets]
+
+
+async def run_load_test(host: str,
+                        port: int,
+                        room_count: int,
+                        snakes_per_room: int,
+                        duration: float,
+                        apply_ticks: bool,
+                        connect_batch: int) -> None:
+    """
+    purpose: connect room_count * snakes_per_room bots and report tick latency percentiles
+    """
+    results = []
+    tasks = []
+    rng = Random(0)
+    start = time.perf_counter()
+    for room_idx in range(room_count):
+        for _ in range(snakes_per_room):
+            tasks.append(asyncio.create_task(run_bot(host, port, f'load-{room_idx}', duration, apply_ticks,
+                                                     Random(rng.random()), results)))
+            # ramp up so the server isn't hit by every connection at once
+            if len(tasks) % connect_batch == 0:
+                await asyncio.sleep(0.05)
+    print(f'{len(tasks)} bots connecting over {time.perf_counter() - start:.1f}s')
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    if errors:
+        print(f'{len(errors)} bots failed, first error: {errors[0]!r}')
+
+    # tick lateness across every bot
+    lateness = sorted(late for tick_rate, arrivals, _ in results for late in get_lateness(tick_rate, arrivals))
+    tick_count = sum(len(arrivals) for _, arrivals, _ in results)
+    bytes_received = sum(bytes_received for _, _, bytes_received in results)
+    if not lateness:
+        print('no ticks received')
+        return
+    p50, p99, p999 = (lateness[min(len(lateness) - 1, int(len(lateness) * fraction))] * 1000
+                      for fraction in (0.5, 0.99, 0.999))
+    print(f'{len(results)} bots in {room_count} rooms, {tick_count} ticks received, '
+          f'{bytes_received / max(tick_count, 1):.0f} bytes/tick per bot')
+    print(f'tick lateness p50 {p50:.1f}ms p99 {p99:.1f}ms p99.9 {p999:.1f}ms max {lateness[-1] * 1000:.1f}ms')
+
+
+# --- main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='load test the multiplayer snake server with bot clients')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rooms', type=int, default=1000)
+    parser.add_argument('--snakes-per-room', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=20, help='seconds each bot plays')
+    parser.add_argument('--apply-ticks', action='store_true', help='apply deltas on every bot to check them')
+    parser.add_argument('--connect-batch', type=int, default=200, help='connections opened between pauses')
+    parser.add_argument('--spawn-server', action='store_true', help='start a server in a subprocess first')
+    args = parser.parse_args()
+
+    # every bot needs a socket, and so does the server if spawned from here
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+    if args.rooms * args.snakes_per_room + 100 > hard_limit:
+        print(f'warning: {args.rooms * args.snakes_per_room} bots need more than the {hard_limit} open file limit')
+
+    server_process = None
+    if args.spawn_server:
+        server_process = subprocess.Popen([sys.executable, '-m', 'src.net.server', '--host', args.host,
+                                           '--port', str(args.port), '--max-snakes', str(args.snakes_per_room)])
+        time.sleep(1)
+    try:
+        asyncio.run(run_load_test(args.host, args.port, args.rooms, args.snakes_per_room, args.duration,
+                                  args.apply_ticks, args.connect_batch))
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.wait()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""protocol.py: binary messages between the multiplayer server and its clients"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import struct
+from array import array
+from collections import deque
+
+from src.engine.engine import SnakeEngine
+
+
+# --- constants ---
+# message types, client -> server
+JOIN = 1  # room name, empty for any room with space
+TURN = 2  # direction index
+# message types, server -> client
+WELCOME = 10  # snake id and room settings
+STATE = 11  # whole room state, sent on join
+TICK = 12  # changes since the last tick
+ERROR = 13  # reason the server closed the connection
+
+HEADER = struct.Struct('<IB')  # payload length, message type
+WELCOME_FORMAT = struct.Struct('<HHHf')  # snake id, tile count, fruit count, ticks per second
+STATE_HEADER = struct.Struct('<IHH')  # tick, snake count, fruit count
+STATE_SNAKE = struct.Struct('<HBII')  # snake id, alive, score, length, followed by length cells
+TICK_HEADER = struct.Struct('<IHHHHH')  # tick, moves, deaths, spawns, fruit moves, snakes removed
+MOVE = struct.Struct('<HB')  # snake id, flags
+SPAWN = struct.Struct('<HI')  # snake id, cell
+FRUIT_MOVE = struct.Struct('<HI')  # fruit idx, cell
+NO_CELL = 0xffffffff  # fruit not on the board
+MAX_ROOM_NAME_BYTES = 64  # longest utf-8 room name a JOIN may carry
+
+# move flags, low 2 bits are the direction index the head moved in
+TAIL_DROPPED = 4
+ATE = 8
+
+
+# --- funcs ---
+def pack(message_type: int, payload: bytes = b'') -> bytes:
+    """
+    purpose: frame a message for the stream
+    """
+    return HEADER.pack(len(payload), message_type) + payload
+
+
+async def read_message(reader) -> tuple:
+    """
+    purpose: read the next message from an asyncio stream
+    :return message_type, payload: (None, None) once the stream is closed
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+        payload_length, message_type = HEADER.unpack(header)
+        return message_type, await reader.readexactly(payload_length)
+    except (ConnectionError, EOFError, OSError):
+        return None, None
+
+
+def encode_cells(cells) -> bytes:
+    """
+    purpose: pack cell ids as uint32, None as NO_CELL
+    """
+    return array('I', (NO_CELL if cell is None else cell for cell in cells)).tobytes()
+
+
+def decode_cells(payload: bytes, idx: int, count: int) -> tuple:
+    """
+    purpose: unpack count cells packed by encode_cells
+    :return cells: list of cell ids, None for NO_CELL
+    :return idx: index of the byte after them
+    """
+    cells = array('I')
+    cells.frombytes(payload[idx:idx + count * cells.itemsize])
+    return [None if cell == NO_CELL else cell for cell in cells], idx + count * cells.itemsize
+
+
+def encode_state(engine, tick: int) -> bytes:
+    """
+    purpose: pack the whole state of a MultiSnakeEngine
+    """
+    parts = [STATE_HEADER.pack(tick, len(engine.snakes), len(engine.fruits))]
+    for snake in engine.snakes.values():
+        parts.append(STATE_SNAKE.pack(snake.snake_id, snake.alive, snake.score, len(snake.body)))
+        parts.append(encode_cells(snake.body))
+    parts.append(encode_cells(engine.fruits))
+    return b''.join(parts)
+
+
+def decode_state(payload: bytes) -> tuple:
+    """
+    purpose: unpack a state packed by encode_state
+    :return tick: tick the state is from
+    :return snakes: snake id -> (alive, score, body cells head first)
+    :return fruits: cell per fruit, None if off the board
+    """
+    tick, snake_count, fruit_count = STATE_HEADER.unpack_from(payload)
+    idx = STATE_HEADER.size
+    snakes = {}
+    for _ in range(snake_count):
+        snake_id, alive, score, length = STATE_SNAKE.unpack_from(payload, idx)
+        body, idx = decode_cells(payload, idx + STATE_SNAKE.size, length)
+        snakes[snake_id] = (bool(alive), score, body)
+    fruits, idx = decode_cells(payload, idx, fruit_count)
+    return tick, snakes, fruits
+
+
+def encode_tick(tick: int,
+                moves: list,
+                deaths: list,
+                spawns: list,
+                fruit_moves: list,
+                removed: list) -> bytes:
+    """
+    purpose: pack the changes of one tick, a snake move takes 3 bytes no matter how long the snake is
+    :param moves: (snake id, direction index, tail dropped, ate fruit)
+    :param deaths: ids of snakes that died
+    :param spawns: (snake id, cell) of snakes put back on the board
+    :param fruit_moves: (fruit idx, cell or None)
+    :param removed: ids of snakes whose player left
+    clients apply removals, spawns, deaths, moves then fruit moves, the order the server made them in
+    """
+    parts = [TICK_HEADER.pack(tick, len(moves), len(deaths), len(spawns), len(fruit_moves), len(removed))]
+    for snake_id, direction_idx, tail_dropped, ate in moves:
+        parts.append(MOVE.pack(snake_id, direction_idx | (TAIL_DROPPED if tail_dropped else 0) | (ATE if ate else 0)))
+    parts.append(array('H', deaths).tobytes())
+    for snake_id, cell in spawns:
+        parts.append(SPAWN.pack(snake_id, cell))
+    for fruit_idx, cell in fruit_moves:
+        parts.append(FRUIT_MOVE.pack(fruit_idx, NO_CELL if cell is None else cell))
+    parts.append(array('H', removed).tobytes())
+    return b''.join(parts)
+
+
+def decode_tick(payload: bytes) -> tuple:
+    """
+    purpose: unpack a tick packed by encode_tick
+    :return tick, moves, deaths, spawns, fruit_moves, removed: same as the encode_tick params
+    """
+    tick, move_count, death_count, spawn_count, fruit_move_count, removed_count = TICK_HEADER.unpack_from(payload)
+    idx = TICK_HEADER.size
+    moves = []
+    for _ in range(move_count):
+        snake_id, flags = MOVE.unpack_from(payload, idx)
+        moves.append((snake_id, flags & 3, bool(flags & TAIL_DROPPED), bool(flags & ATE)))
+        idx += MOVE.size
+    deaths = array('H')
+    deaths.frombytes(payload[idx:idx + death_count * 2])
+    idx += death_count * 2
+    spawns = []
+    for _ in range(spawn_count):
+        spawns.append(SPAWN.unpack_from(payload, idx))
+        idx += SPAWN.size
+    fruit_moves = []
+    for _ in range(fruit_move_count):
+        fruit_idx, cell = FRUIT_MOVE.unpack_from(payload, idx)
+        fruit_moves.append((fruit_idx, None if cell == NO_CELL else cell))
+        idx += FRUIT_MOVE.size
+    removed = array('H')
+    removed.frombytes(payload[idx:idx + removed_count * 2])
+    return tick, moves, list(deaths), spawns, fruit_moves, list(removed)
+
+
+# --- classes ---
+class ClientState:
+    """
+    purpose: copy of a room's state on a client, rebuilt from a STATE message and kept up to date by TICK messages
+    """
+    def __init__(self, tile_count: int):
+        # attr from params
+        self.tile_count = tile_count
+
+        self.tick = 0
+        self.snakes = {}  # snake id -> [alive, score, body deque head first]
+        self.fruits = []
+
+    def apply_state(self, payload: bytes) -> None:
+        """
+        purpose: replace the state with a STATE message
+        """
+        self.tick, snakes, self.fruits = decode_state(payload)
+        self.snakes = {snake_id: [alive, score, deque(body)] for snake_id, (alive, score, body) in snakes.items()}
+
+    def apply_tick(self, payload: bytes) -> None:
+        """
+        purpose: apply a TICK message
+        """
+        self.tick, moves, deaths, spawns, fruit_moves, removed = decode_tick(payload)
+        # same order the server changed its state in
+        for snake_id in removed:
+            self.snakes.pop(snake_id, None)
+        for snake_id, cell in spawns:
+            self.snakes[snake_id] = [True, 0, deque((cell,))]
+        for snake_id in deaths:
+            snake = self.snakes[snake_id]
+            snake[0] = False
+            snake[2].clear()
+        for snake_id, direction_idx, tail_dropped, ate in moves:
+            snake = self.snakes[snake_id]
+            body = snake[2]
+            direction = SnakeEngine.DIRECTIONS[direction_idx]
+            head_y, head_x = divmod(body[0], self.tile_count)
+            if tail_dropped:
+                body.pop()
+            body.appendleft((head_y + direction[1]) * self.tile_count + head_x + direction[0])
+            if ate:
+                snake[1] += 1
+        for fruit_idx, cell in fruit_moves:
+            self.fruits[fruit_idx] = cell
@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""server.py: asyncio multiplayer server running many snake rooms in one process"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import argparse
+import asyncio
+import itertools
+from collections import deque
+
+from src.engine.engine import SnakeEngine
+from src.engine.multi_engine import MultiSnakeEngine
+from src.net import protocol
+
+
+# --- classes ---
+class Connection:
+    """
+    purpose: one client connected to a room
+    """
+    def __init__(self, writer: asyncio.StreamWriter,
+                 max_buffer_bytes: int):
+        # attr from params
+        self.writer = writer
+        self.max_buffer_bytes = max_buffer_bytes
+
+        self.room = None
+        self.snake_id = None
+        self.closed = False
+
+    def send(self, data: bytes) -> None:
+        """
+        purpose: queue data without waiting, dropping a client too slow to keep up instead of buffering forever
+        """
+        if self.closed:
+            return
+        if self.writer.transport.get_write_buffer_size() > self.max_buffer_bytes:
+            print(f'dropping slow client of snake {self.snake_id}')
+            self.close()
+            return
+        self.writer.write(data)
+
+    def close(self) -> None:
+        """
+        purpose: close the connection, the read loop then takes the snake out of its room
+        """
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+
+class Room:
+    """
+    purpose: several snakes on one board, stepped on a fixed tick with the changes broadcast to every client
+    turns arriving between ticks are batched and applied together on the next tick, the last one per snake wins
+    """
+    def __init__(self, name: str,
+                 tile_count: int,
+                 fruit_count: int,
+                 tick_rate: float,
+                 max_snakes: int,
+                 respawn_ticks: int,
+                 stats):
+        # attr from params
+        self.name = name
+        self.tick_rate = tick_rate
+        self.max_snakes = max_snakes
+        self.respawn_ticks = respawn_ticks
+        self.stats = stats
+
+        self.engine = MultiSnakeEngine(tile_count, fruit_count)
+        self.connections = {}  # snake id -> Connection
+        # snake ids go out as uint16, so they are reused, each only once its removal has been broadcast
+        self.free_snake_ids = deque(range(min(2 * max_snakes, 0x10000)))
+        self.turns = {}  # snake id -> direction for the next tick
+        self.respawn_at = {}  # snake id -> tick a dead snake comes back on
+        self.removed = []  # snakes whose player left since the last tick
+        self.tick = 0
+        self.task = None
+
+    @property
+    def full(self) -> bool:
+        """
+        purpose: check if the room can't take another snake
+        """
+        return len(self.connections) >= self.max_snakes or not self.free_snake_ids
+
+    def join(self, connection: Connection) -> None:
+        """
+        purpose: add a snake for a client, it spawns on the next tick
+        """
+        snake_id = self.free_snake_ids.popleft()
+        self.engine.add_snake(snake_id)
+        self.respawn_at[snake_id] = self.tick + 1
+        self.connections[snake_id] = connection
+        connection.room = self
+        connection.snake_id = snake_id
+
+        # settings then everything so far, ticks after this are deltas
+        connection.send(protocol.pack(protocol.WELCOME, protocol.WELCOME_FORMAT.pack(
+            snake_id, self.engine.tile_count, self.engine.fruit_count, self.tick_rate)))
+        connection.send(protocol.pack(protocol.STATE, protocol.encode_state(self.engine, self.tick)))
+
+    def leave(self, connection: Connection) -> None:
+        """
+        purpose: take a client's snake off the board
+        """
+        snake_id = connection.snake_id
+        del self.connections[snake_id]
+        self.engine.remove_snake(snake_id)
+        self.turns.pop(snake_id, None)
+        self.respawn_at.pop(snake_id, None)
+        self.removed.append(snake_id)
+
+    def turn(self, snake_id: int, direction_idx: int) -> None:
+        """
+        purpose: queue a turn for the next tick
+        """
+        if 0 <= direction_idx < 4:
+            self.turns[snake_id] = SnakeEngine.DIRECTIONS[direction_idx]
+
+    async def run(self) -> None:
+        """
+        purpose: tick on a fixed schedule until everyone leaves, a late tick doesn't push back the next one
+        """
+        loop = asyncio.get_running_loop()
+        tick_time = 1 / self.tick_rate
+        next_tick = loop.time() + tick_time
+        while self.connections:
+            await asyncio.sleep(next_tick - loop.time())
+            self.stats.tick_lateness.append(loop.time() - next_tick)
+            self.update()
+            next_tick += tick_time
+            # fell more than a tick behind, skip ticks rather than bursting to catch up
+            if loop.time() > next_tick:
+                next_tick = loop.time() + tick_time
+
+    def update(self) -> None:
+        """
+        purpose: step the room one tick and broadcast what changed
+        """
+        self.tick += 1
+
+        # bring back dead snakes
+        spawns = []
+        for snake_id, respawn_tick in list(self.respawn_at.items()):
+            if respawn_tick <= self.tick:
+                cell = self.engine.spawn(snake_id)
+                if cell is not None:
+                    del self.respawn_at[snake_id]
+                    spawns.append((snake_id, cell))
+
+        # apply batched turns
+        turns = self.turns
+        self.turns = {}
+        moves, deaths, fruit_moves = self.engine.step(turns)
+        for snake_id in deaths:
+            self.respawn_at[snake_id] = self.tick + self.respawn_ticks
+
+        # broadcast deltas, encoded once for the whole room
+        snakes = self.engine.snakes
+        moves = [(snake_id, SnakeEngine.DIRECTIONS.index(snakes[snake_id].direction), tail_dropped, ate)
+                 for snake_id, new_head, tail_dropped, ate in moves]
+        message = protocol.pack(protocol.TICK,
+                                protocol.encode_tick(self.tick, moves, deaths, spawns, fruit_moves, self.removed))
+        self.free_snake_ids.extend(self.removed)
+        self.removed = []
+        for connection in list(self.connections.values()):
+            connection.send(message)
+        self.stats.bytes_sent += len(message) * len(self.connections)
+
+
+class ServerStats:
+    """
+    purpose: counters for judging how the server holds up under load
+    """
+    def __init__(self):
+        self.tick_lateness = deque(maxlen=100000)  # seconds each tick ran after it was due
+        self.bytes_sent = 0
+
+
+class SnakeServer:
+    """
+    purpose: accept clients and put them in rooms, each room ticks on its own task
+    """
+    def __init__(self,
+                 tile_count: int = 32,
+                 fruit_count: int = 4,
+                 tick_rate: float = 10,
+                 max_snakes: int = 8,
+                 respawn_ticks: int = 10,
+                 max_buffer_bytes: int = 64 * 1024):
+        # attr from params
+        self.tile_count = tile_count
+        self.fruit_count = fruit_count
+        self.tick_rate = tick_rate
+        self.max_snakes = max_snakes
+        self.respawn_ticks = respawn_ticks
+        self.max_buffer_bytes = max_buffer_bytes
+
+        self.rooms = {}  # room name -> Room
+        self.room_ids = itertools.count()
+        self.open_room = None  # room new players without a room name go to
+        self.stats = ServerStats()
+
+    def get_room(self, name: str) -> Room:
+        """
+        purpose: get a named room, or a room with space if name is empty, making a new one if needed
+        """
+        if not name:
+            if self.open_room is None or self.open_room.full or self.open_room.name not in self.rooms:
+                self.open_room = self.get_room(f'auto-{next(self.room_ids)}')
+            return self.open_room
+
+        room = self.rooms.get(name)
+        if room is None:
+            room = Room(name, self.tile_count, self.fruit_count, self.tick_rate, self.max_snakes,
+                        self.respawn_ticks, self.stats)
+            self.rooms[name] = room
+        return room
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """
+        purpose: join the client to a room, then feed its turns to the room until it disconnects
+        """
+        connection = Connection(writer, self.max_buffer_bytes)
+        message_type, payload = await protocol.read_message(reader)
+        if message_type != protocol.JOIN:
+            connection.close()
+            return
+
+        # room names are short utf-8 strings, anything else gets the same treatment as a full room
+        try:
+            if len(payload) > protocol.MAX_ROOM_NAME_BYTES:
+                raise ValueError(f'room name over {protocol.MAX_ROOM_NAME_BYTES} bytes')
+            room_name = payload.decode()
+        except ValueError as error:  # UnicodeDecodeError is a ValueError
+            connection.send(protocol.pack(protocol.ERROR, f'bad room name, {error}'.encode()))
+            connection.close()
+            return
+
+        room = self.get_room(room_name)
+        if room.full:
+            connection.send(protocol.pack(protocol.ERROR, b'room full'))
+            connection.close()
+            return
+        room.join(connection)
+        if room.task is None or room.task.done():
+            room.task = asyncio.create_task(room.run())
+            room.task.add_done_callback(lambda _: self.close_room(room))
+
+        try:
+            while not connection.closed:
+                message_type, payload = await protocol.read_message(reader)
+                if message_type is None:
+                    break
+                if message_type == protocol.TURN and payload:
+                    room.turn(connection.snake_id, payload[0])
+        finally:
+            room.leave(connection)
+            connection.close()
+
+    def close_room(self, room: Room) -> None:
+        """
+        purpose: forget a room once its last player leaves
+        """
+        if self.rooms.get(room.name) is room and not room.connections:
+            del self.rooms[room.name]
+
+    async def report(self, interval: float) -> None:
+        """
+        purpose: print load and tick lateness every interval seconds
+        """
+        while True:
+            await asyncio.sleep(interval)
+            lateness = sorted(self.stats.tick_lateness)
+            self.stats.tick_lateness.clear()
+            if lateness:
+                p50 = lateness[len(lateness) // 2] * 1000
+                p99 = lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))] * 1000
+                print(f'{len(self.rooms)} rooms, {sum(len(room.connections) for room in self.rooms.values())} '
+                      f'players, tick lateness p50 {p50:.1f}ms p99 {p99:.1f}ms max {lateness[-1] * 1000:.1f}ms, '
+                      f'{self.stats.bytes_sent / interval / 1024:.0f} KiB/s sent')
+            self.stats.bytes_sent = 0
+
+    async def serve(self, host: str, port: int,
+                    report_interval: float = 10) -> None:
+        """
+        purpose: run the server forever
+        """
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f'serving on {host}:{port}')
+        asyncio.create_task(self.report(report_interval))
+        async with server:
+            await server.serve_forever()
+
+
+# --- main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='multiplayer snake server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--tile-count', type=int, default=32)
+    parser.add_argument('--fruit-count', type=int, default=4)
+    parser.add_argument('--tick-rate', type=float, default=10, help='ticks per second in every room')
+    parser.add_argument('--max-snakes', type=int, default=8, help='players per room')
+    parser.add_argument('--report-interval', type=float, default=10, help='seconds between load reports')
+    args = parser.parse_args()
+
+    snake_server = SnakeServer(args.tile_count, args.fruit_count, args.tick_rate, args.max_snakes)
+    try:
+        asyncio.run(snake_server.serve(args.host, args.port, args.report_interval))
+    except KeyboardInterrupt:
+        print('exiting server...')
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""snapshot.py: keyframe and delta codec for streaming a SnakeEngine game to spectators"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+from collections import deque
+
+from src.engine.engine import SnakeEngine
+from src.engine.replay import read_varint, write_varint
+
+
+# --- constants ---
+KEYFRAME = 1
+DELTA = 2
+
+# delta flags, low 2 bits are the direction index
+HEAD_ADDED = 4
+TAIL_REMOVED = 8
+SCORE_CHANGED = 16
+FRUITS_CHANGED = 32
+GAME_OVER = 64  # followed by the outcome
+
+# game over outcomes
+WON = 0
+LOSS_CAUSES = (None, 'wall', 'collision')  # outcome -> SnakeEngine.loss_cause, same codes as BatchSnakeEngine
+
+
+# --- classes ---
+class SnapshotEncoder:
+    """
+    purpose: turn each engine step into a message, a keyframe of the whole game every keyframe_interval steps
+    and a delta of what changed otherwise, so a delta stays a few bytes however long the snake gets
+    """
+    def __init__(self, engine: SnakeEngine,
+                 keyframe_interval: int = 300):
+        # attr from params
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+
+        # state as of the last message
+        self.steps = None
+        self.head = None
+        self.length = None
+        self.score = None
+        self.fruits = None
+        self.keyframe_steps = None
+
+    def force_keyframe(self) -> None:
+        """
+        purpose: make the next message a keyframe, e.g. when a spectator joins
+        """
+        self.steps = None
+
+    def encode(self):
+        """
+        purpose: get the message for the engine's current state, call after every step
+        anything but the next step of the same game, e.g. a reset, is sent as a keyframe
+        """
+        engine = self.engine
+        if (self.steps is None or engine.steps != self.steps + 1 or len(engine.fruits) != len(self.fruits)
+                or engine.steps - self.keyframe_steps >= self.keyframe_interval):
+            message = self.encode_keyframe()
+        else:
+            message = self.encode_delta()
+
+        self.steps = engine.steps
+        self.head = engine.head
+        self.length = len(engine.body)
+        self.score = engine.score
+        self.fruits = list(engine.fruits)
+        return message
+
+    def encode_keyframe(self) -> bytes:
+        """
+        purpose: pack the whole game, the body as its head plus 2 bits per segment for the way to the next one
+        """
+        engine = self.engine
+        self.keyframe_steps = engine.steps
+        data = bytearray((KEYFRAME,))
+        for value in (engine.steps, engine.tile_count, engine.score, get_outcome(engine) + 1,
+                      SnakeEngine.DIRECTIONS.index(engine.direction), len(engine.body), engine.body[0]):
+            write_varint(data, value)
+
+        # body, each segment is next to the one before it, 4 segments per byte
+        delta_directions = {-engine.tile_count: 0, 1: 1, engine.tile_count: 2, -1: 3}  # cell step -> direction idx
+        body = list(engine.body)
+        packed = bytearray((len(body) + 2) // 4)
+        for segment_idx in range(1, len(body)):
+            direction_idx = delta_directions[body[segment_idx] - body[segment_idx - 1]]
+            packed[(segment_idx - 1) >> 2] |= direction_idx << (2 * ((segment_idx - 1) & 3))
+        data += packed
+
+        write_varint(data, len(engine.fruits))
+        for fruit in engine.fruits:
+            write_varint(data, fruit)
+        return bytes(data)
+
+    def encode_delta(self) -> bytes:
+        """
+        purpose: pack the changes made by one step
+        """
+        engine = self.engine
+        flags = SnakeEngine.DIRECTIONS.index(engine.direction)
+        if engine.head != self.head:
+            flags |= HEAD_ADDED
+            if len(engine.body) == self.length:
+                flags |= TAIL_REMOVED
+        if engine.score != self.score:
+            flags |= SCORE_CHANGED
+        changed_fruits = [(fruit_idx, fruit) for fruit_idx, (fruit, last_fruit) in
+                          enumerate(zip(engine.fruits, self.fruits)) if fruit != last_fruit]
+        if changed_fruits:
+            flags |= FRUITS_CHANGED
+        if engine.done:
+            flags |= GAME_OVER
+
+        data = bytearray((DELTA, flags))
+        if flags & SCORE_CHANGED:
+            write_varint(data, engine.score)
+        if flags & FRUITS_CHANGED:
+            write_varint(data, len(changed_fruits))
+            for fruit_idx, fruit in changed_fruits:
+                write_varint(data, fruit_idx)
+                write_varint(data, fruit)
+        if flags & GAME_OVER:
+            data.append(get_outcome(engine))
+        return bytes(data)
+
+
+class SnapshotApplier:
+    """
+    purpose: rebuild a game on the spectator side from SnapshotEncoder messages
+    deltas before the first keyframe are skipped, messages must arrive in order with none missing
+    """
+    def __init__(self):
+        self.synced = False
+        self.steps = 0
+        self.tile_count = None
+        self.score = 0
+        self.lost = False
+        self.won = False
+        self.loss_cause = None
+        self.direction = SnakeEngine.RIGHT
+        self.body = deque()  # cell ids, head first
+        self.fruits = []
+
+    def apply(self, message: bytes) -> bool:
+        """
+        purpose: apply one message
+        :return applied: False if a delta was skipped waiting for a keyframe
+        """
+        if message[0] == KEYFRAME:
+            self.apply_keyframe(message)
+            return True
+        if not self.synced:
+            return False
+        self.apply_delta(message)
+        return True
+
+    def apply_keyframe(self, message: bytes) -> None:
+        """
+        purpose: replace the game with a keyframe
+        """
+        idx = 1
+        values = []
+        for _ in range(7):
+            value, idx = read_varint(message, idx)
+            values.append(value)
+        self.steps, self.tile_count, self.score, outcome, direction_idx, length, head = values
+        self.set_outcome(outcome - 1)
+        self.direction = SnakeEngine.DIRECTIONS[direction_idx]
+
+        # body from head plus the way to each next segment
+        cell_steps = (-self.tile_count, 1, self.tile_count, -1)  # direction idx -> cell step
+        packed_length = (length + 2) // 4
+        packed = message[idx:idx + packed_length]
+        idx += packed_length
+        self.body = deque((head,))
+        cell = head
+        for segment_idx in range(length - 1):
+            cell += cell_steps[packed[segment_idx >> 2] >> (2 * (segment_idx & 3)) & 3]
+            self.body.append(cell)
+
+        fruit_count, idx = read_varint(message, idx)
+        self.fruits = []
+        for _ in range(fruit_count):
+            fruit, idx = read_varint(message, idx)
+            self.fruits.append(fruit)
+        self.synced = True
+
+    def apply_delta(self, message: bytes) -> None:
+        """
+        purpose: apply the changes of one step
+        """
+        flags = message[1]
+        idx = 2
+        self.steps += 1
+        self.direction = SnakeEngine.DIRECTIONS[flags & 3]
+        if flags & HEAD_ADDED:
+            x, y = self.direction
+            self.body.appendleft(self.body[0] + y * self.tile_count + x)
+            if flags & TAIL_REMOVED:
+                self.body.pop()
+        if flags & SCORE_CHANGED:
+            self.score, idx = read_varint(message, idx)
+        if flags & FRUITS_CHANGED:
+            change_count, idx = read_varint(message, idx)
+            for _ in range(change_count):
+                fruit_idx, idx = read_varint(message, idx)
+                self.fruits[fruit_idx], idx = read_varint(message, idx)
+        if flags & GAME_OVER:
+            self.set_outcome(message[idx])
+
+    def set_outcome(self, outcome: int) -> None:
+        """
+        purpose: set win and loss state from an outcome code, -1 while playing
+        """
+        self.won = outcome == WON
+        self.lost = outcome > WON
+        self.loss_cause = LOSS_CAUSES[outcome] if outcome > WON else None
+
+
+# --- funcs ---
+def get_outcome(engine: SnakeEngine) -> int:
+    """
+    purpose: get outcome code of a game, -1 while playing
+    """
+    if engine.won:
+        return WON
+    if engine.lost:
+        return LOSS_CAUSES.index(engine.loss_cause)
+    return -1
+
+
+# --- test ---
+if __name__ == "__main__":
+    from src.benchmark import set_snake
+
+    # stream a long game that never dies and check the spectator copy stays exact
+    engine = SnakeEngine(tile_count=32, fruit_count=4, seed=0)
+    next_directions = set_snake(engine, 3)
+    encoder = SnapshotEncoder(engine)
+    applier = SnapshotApplier()
+    delta_bytes = 0
+    delta_count = 0
+    keyframe_bytes = 0
+    while not engine.done:
+        engine.step(next_directions[engine.head])
+        message = encoder.encode()
+        applier.apply(message)
+        if message[0] == DELTA:
+            delta_bytes += len(message)
+            delta_count += 1
+        else:
+            keyframe_bytes = max(keyframe_bytes, len(message))
+        assert list(applier.body) == list(engine.body) and applier.fruits == engine.fruits
+    print(f'{engine.steps} steps to fill the board, state matches: '
+          f'{(applier.score, applier.won, applier.steps) == (engine.score, engine.won, engine.steps)}, '
+          f'{delta_bytes / delta_count:.2f} bytes per delta, largest keyframe {keyframe_bytes} bytes')
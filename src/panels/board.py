@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-"""main.py: high level game logic"""
+"""board.py: checkered playing board panel"""
 
 __author__ = "Travis Mann"
 __version__ = "1.0"
@@ -21,11 +21,13 @@ from src.panels.panel import Panel
 class Board(Panel):
     """
     purpose: main playing board to place items and snake on
+    boards too big to fit at min_tile_size scroll, showing a view that follows the snake
     """
     def __init__(self,
                  tile_count: int,
                  size: Vector2,
-                 position: Vector2):
+                 position: Vector2,
+                 min_tile_size: int = 20):
         # attr from params
         self.tile_count = tile_count
         print(f'board init pos: {position.x}, {position.y}')
@@ -35,34 +37,124 @@ class Board(Panel):
                             (125, 210, 75))
 
         # tiles
-        self.tile_size = int(size.x / self.tile_count)
+        self.tile_size = max(int(size.x / self.tile_count), min_tile_size)
         # adjust size and tile_size so that the tiles are ints
         self.tile_size = int(self.tile_size)
         adjusted_length = self.tile_size * tile_count
+        self.world_length = adjusted_length  # pixel length of the whole board
+
+        # view of a board too big for the panel, world pixel at the top left of the view
+        self.scrolling = adjusted_length > size.x
+        if self.scrolling:
+            adjusted_length = int(size.x)
         self.size = Vector2(adjusted_length, adjusted_length)
-        # generate tile list
-        self.tiles = [Vector2(column_idx, row_idx) for row_idx in range(tile_count) for column_idx in range(tile_count)]
+        self.view_x = 0
+        self.view_y = 0
 
         # init parent Panel class
         super().__init__(size=self.size,
                          position=position)
 
+        # tile pattern drawn once and reused every frame
+        self.background = None
+        self.background_key = None  # tile settings the background was drawn with
+
     def draw(self) -> None:
         """
         purpose: draw board design and tiles
         """
         # draw tiles
-        self.draw_tiles()
+        self.update_background()
+        pattern_x, pattern_y = self.get_pattern_offset()
+        self.surface.blit(self.background, (0, 0), self.surface.get_rect().move(pattern_x, pattern_y))
+
+    def update_background(self) -> None:
+        """
+        purpose: redraw background tiles only if the tile settings changed
+        """
+        background_key = (self.tile_count, self.tile_size, self.tile_colors)
+        if background_key != self.background_key:
+            self.draw_tiles()
+            self.background_key = background_key
+
+    def restore_cells(self, cells) -> list:
+        """
+        purpose: redraw the background on the given cells only, cell = row_idx * tile_count + column_idx
+        :return rects: board rectangles that were redrawn, cells off the board or out of view are skipped
+        """
+        self.update_background()
+        pattern_x, pattern_y = self.get_pattern_offset()
+        view_rect = self.surface.get_rect()
+        rects = []
+        for cell in cells:
+            if 0 <= cell < self.tile_count * self.tile_count:
+                row_idx, column_idx = divmod(cell, self.tile_count)
+                rect = pygame.Rect(column_idx * self.tile_size - self.view_x, row_idx * self.tile_size - self.view_y,
+                                   self.tile_size, self.tile_size)
+                if self.scrolling:
+                    rect = rect.clip(view_rect)
+                    if not rect:
+                        continue
+                self.surface.blit(self.background, rect, rect.move(pattern_x, pattern_y))
+                rects.append(rect)
+        return rects
+
+    def get_pattern_offset(self) -> tuple:
+        """
+        purpose: get where the view's top left corner is on the background
+        a scrolling board's background is only the tile pattern, a few tiles bigger than the view
+        """
+        if not self.scrolling:
+            return 0, 0
+        period = 2 * self.tile_size  # tile colors repeat every 2 tiles
+        return self.view_x % period + period, self.view_y % period + period
+
+    def follow(self, x: float, y: float) -> bool:
+        """
+        purpose: center the view on a world pixel, stopping at the edges of the board
+        :return moved: True if the view moved
+        """
+        if not self.scrolling:
+            return False
+        view_length = self.surface.get_width()
+        view_x = min(max(int(x - view_length / 2), 0), self.world_length - view_length)
+        view_y = min(max(int(y - view_length / 2), 0), self.world_length - view_length)
+        moved = (view_x, view_y) != (self.view_x, self.view_y)
+        self.view_x = view_x
+        self.view_y = view_y
+        return moved
+
+    def get_visible_cells(self, margin: int = 1) -> list:
+        """
+        purpose: get cells in view plus margin tiles around it, for things that spill onto the view
+        """
+        view_length = self.surface.get_width()
+        first_column = max(0, self.view_x // self.tile_size - margin)
+        last_column = min(self.tile_count - 1, (self.view_x + view_length - 1) // self.tile_size + margin)
+        first_row = max(0, self.view_y // self.tile_size - margin)
+        last_row = min(self.tile_count - 1, (self.view_y + view_length - 1) // self.tile_size + margin)
+        return [row_idx * self.tile_count + column_idx
+                for row_idx in range(first_row, last_row + 1)
+                for column_idx in range(first_column, last_column + 1)]
 
     def draw_tiles(self) -> None:
         """
-        purpose: draw tiles on screen
+        purpose: draw tiles to the background surface
         """
+        if self.scrolling:
+            # tile pattern covering the view from any pattern offset
+            pattern_length = self.surface.get_width() + 4 * self.tile_size
+            self.background = pygame.Surface((pattern_length, pattern_length))
+            pattern_tile_count = -(-pattern_length // self.tile_size)
+        else:
+            self.background = pygame.Surface(self.surface.get_size())
+            pattern_tile_count = self.tile_count
+
         # draw tiles
-        tile_counter = 0
-        for tile_col_idx in range(self.tile_count):
-            for tile_row_idx in range(self.tile_count):
-                # get tile color
+        for tile_col_idx in range(pattern_tile_count):
+            for tile_row_idx in range(pattern_tile_count):
+                # get tile color, same order tiles were counted in on a whole board
+                tile_counter = tile_col_idx * self.tile_count + tile_row_idx
                 if tile_counter % 2 == 0:
                     tile_color = self.tile_colors[0]
                 else:
@@ -73,12 +165,9 @@ class Board(Panel):
                 tile_position_y = tile_row_idx * self.tile_size
 
                 # draw tile
-                pygame.draw.rect(self.surface, tile_color,
+                pygame.draw.rect(self.background, tile_color,
                                  (tile_position_x, tile_position_y, self.tile_size, self.tile_size))
 
-                # inc counter
-                tile_counter += 1
-
 
 # --- test ---
 if __name__ == "__main__":
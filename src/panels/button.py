@@ -14,11 +14,14 @@ __status__ = "Production"
 import pygame
 from pygame.math import Vector2
 
+from src.assets import asset_manager
+
 
 # --- classes ---
 class Button:
     """
     purpose: basic clickable button, centered on position
+    driven by mouse events passed to handle_event rather than polling the mouse every frame
     """
     def __init__(self,
                  size: Vector2,
@@ -51,16 +54,16 @@ class Button:
         self.border_radius = 12
 
         # text
-        font = pygame.font.Font(None, int(min(size) * 0.5))
+        font = asset_manager.get_font(None, int(min(size) * 0.5))
         self.text_surface = font.render(text, True, font_color)
         self.text_rectangle = self.text_surface.get_rect(center=self.top_rectangle.center)
 
         # track click
+        self.hovering = False  # mouse over the top of the button
         self.pressing = False  # tracks clicking animation
         self.pressed = False  # used to trigger events from button elsewhere
 
-    def draw(self, surface: pygame.Surface,
-             surface_rect: pygame.rect) -> None:
+    def draw(self, surface: pygame.Surface) -> None:
         """
         purpose: draw button elements to the given surface
         """
@@ -78,39 +81,38 @@ class Button:
         # draw text to top surface
         surface.blit(self.text_surface, self.text_rectangle)
 
-        # check for a click
-        self.check_click(surface_rect)
+    def handle_event(self, event: pygame.event.Event,
+                     surface_rect: pygame.Rect) -> bool:
+        """
+        purpose: update hover and click state from a mouse event, a click is a left press and release on the button
+        :param surface_rect: screen rectangle of the surface the button is drawn on
+        :return changed: True if the button looks different and needs drawing again
+        """
+        if event.type not in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            return False
+        hovering, pressing = self.hovering, self.pressing
+
+        # mouse position relative to surface
+        self.set_hover((event.pos[0] - surface_rect.left, event.pos[1] - surface_rect.top))
+
+        # check if left click occurred
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.hovering:
+            print('click!')
+            self.pressing = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.pressing:
+            # triggers on the end of a press, unless the mouse left the button
+            self.pressing = False
+            self.pressed = self.hovering
+
+        return (hovering, pressing) != (self.hovering, self.pressing)
 
-    def check_click(self, surface_rect: pygame.rect):
+    def set_hover(self, mouse_position: tuple) -> None:
         """
-        purpose: check if the button has been clicked
+        purpose: update top rectangle color for the mouse being over the button or not
+        :param mouse_position: position relative to the surface the button is drawn on
         """
-        # get mouse position
-        mouse_position = pygame.mouse.get_pos()
-
-        # adjust relative to surface
-        adjusted_mouse_position_x = mouse_position[0] - surface_rect.left
-        adjusted_mouse_position_y = mouse_position[1] - surface_rect.top
-        mouse_position = (adjusted_mouse_position_x, adjusted_mouse_position_y)
-
-        # check mouse/button collision
-        if self.top_rectangle.collidepoint(mouse_position):
-            # update top rectangle color on hover
-            self.top_color = self.hover_color
-
-            # check if left click occurred
-            if pygame.mouse.get_pressed()[0]:
-                # check if current press is already been handled
-                if not self.pressing:
-                    print('click!')
-                    self.pressing = True
-            else:  # current press over, reset pressed status
-                if self.pressing:  # triggers on the end of a press
-                    self.pressing = False
-                    self.pressed = True
-
-        else:  # reset top rectangle color
-            self.top_color = self.default_top_color
+        self.hovering = self.top_rectangle.collidepoint(mouse_position)
+        self.top_color = self.hover_color if self.hovering else self.default_top_color
 
 
 # --- test ---
@@ -140,6 +142,7 @@ if __name__ == "__main__":
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            button.handle_event(event, screen.get_rect())
         # add delay between loops
         pygame.time.delay(50)
         button.draw(screen)
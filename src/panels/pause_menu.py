@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-"""main.py: high level game logic"""
+"""pause_menu.py: menu shown over the board while the game is paused, with continue and quit buttons"""
 
 __author__ = "Travis Mann"
 __version__ = "1.0"
@@ -14,6 +14,7 @@ __status__ = "Production"
 import pygame
 from pygame.math import Vector2
 
+from src.assets import asset_manager
 from src.panels.panel import Panel
 from src.panels.button import Button
 
@@ -22,6 +23,7 @@ from src.panels.button import Button
 class PauseMenu(Panel):
     """
     purpose: general pause menu
+    drawn once and kept, only drawn again when a button's hover or press state changes
     """
 
     def __init__(self,
@@ -49,8 +51,8 @@ class PauseMenu(Panel):
 
         # add image
         image_size = self.size.x * 0.8
-        self.image = pygame.transform.scale(pygame.image.load('./img/snake1/head.png'),
-                                            (image_size, image_size))
+        self.image = asset_manager.get_image('./img/snake1/head.png',
+                                             (image_size, image_size))
         self.image_rect = self.image.get_rect()
         self.image_rect.center = self.surface_rect.center
 
@@ -60,10 +62,17 @@ class PauseMenu(Panel):
         # background attributes
         self.border_radius = 12
 
+        # menu needs drawing again
+        self.dirty = True
+
     def draw(self) -> None:
         """
-        purpose: draw all elements to pause menu surface
+        purpose: draw all elements to pause menu surface, does nothing if nothing changed since the last draw
         """
+        if not self.dirty:
+            return
+        self.dirty = False
+
         # fill in pause menu background
         pygame.draw.rect(self.surface, self.color, self.surface.get_rect(), border_radius=self.border_radius)
 
@@ -71,12 +80,30 @@ class PauseMenu(Panel):
         self.surface.blit(self.image, self.image_rect)
 
         # add buttons
-        self.quit_button.draw(self.surface,
-                              self.surface_rect)
-        self.continue_button.draw(self.surface,
-                                  self.surface_rect)
+        self.quit_button.draw(self.surface)
+        self.continue_button.draw(self.surface)
 
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """
+        purpose: pass a mouse event to the buttons
+        :return changed: True if the menu needs drawing again
+        """
+        changed = False
+        for button in (self.quit_button, self.continue_button):
+            changed = button.handle_event(event, self.surface_rect) or changed
+        self.dirty = self.dirty or changed
+        return changed
 
+    def set_hover(self, mouse_position: tuple) -> None:
+        """
+        purpose: update button hover for a screen mouse position, e.g. when the menu opens without the mouse moving
+        """
+        hovering = (self.quit_button.hovering, self.continue_button.hovering)
+        surface_rect = self.surface.get_rect(**{self.position_on: self.position})  # where show puts the menu
+        for button in (self.quit_button, self.continue_button):
+            button.set_hover((mouse_position[0] - surface_rect.left, mouse_position[1] - surface_rect.top))
+        if hovering != (self.quit_button.hovering, self.continue_button.hovering):
+            self.dirty = True
 
 
 # --- test ---
@@ -102,6 +129,7 @@ if __name__ == "__main__":
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            pm.handle_event(event)
         # add delay between loops
         pygame.time.delay(50)
         pm.draw()
@@ -14,6 +14,7 @@ __status__ = "Production"
 import pygame
 from pygame.math import Vector2
 
+from src.assets import asset_manager
 from src.panels.panel import Panel
 
 
@@ -33,12 +34,19 @@ class ScorePanel(Panel):
 
         # track score
         self.score = 0
-        # text
-        self.font = pygame.font.Font('freesansbold.ttf', int(self.size.y * 0.4))
+        # text, each digit rendered once and the score built from them when it changes
+        self.font_size = int(self.size.y * 0.4)
+        self.text_color = (255, 255, 255)
+        self.font = asset_manager.get_font('freesansbold.ttf', self.font_size)
+        self.digits = [asset_manager.get_text('freesansbold.ttf', self.font_size, str(digit), self.text_color)
+                       for digit in range(10)]  # transparent so overhangs don't cut into the digit before
+        self.digit_advances = [metrics[4] for metrics in self.font.metrics('0123456789')]  # pixels to next digit
+        self.score_text = None
+        self.score_text_value = None  # score shown by score_text
 
         # place fruit icon
-        self.fruit_image = pygame.transform.scale(pygame.image.load('./img/fruit/peach.png'),
-                                                  (self.size.y * 0.4, self.size.y * 0.4))
+        self.fruit_image = asset_manager.get_image('./img/fruit/peach.png',
+                                                   (self.size.y * 0.4, self.size.y * 0.4))
         self.fruit_rect = self.fruit_image.get_rect()
         self.fruit_rect.center = (self.size.x * 0.09, self.size.y * 0.5)
 
@@ -53,10 +61,28 @@ class ScorePanel(Panel):
         self.surface.blit(self.fruit_image, self.fruit_rect)
 
         # place score
-        score_text = self.font.render(str(self.score), True, (255, 255, 255), self.color)
-        text_rect = score_text.get_rect()
+        if self.score != self.score_text_value:
+            self.score_text = self.build_score_text()
+            self.score_text_value = self.score
+        text_rect = self.score_text.get_rect()
         text_rect.midleft = (self.fruit_rect.right + 0.01 * self.size.x, self.fruit_rect.center[1])
-        self.surface.blit(score_text, text_rect)
+        self.surface.blit(self.score_text, text_rect)
+
+    def build_score_text(self) -> pygame.Surface:
+        """
+        purpose: put the score together from the digit images
+        """
+        text = str(self.score)
+        width = (sum(self.digit_advances[int(character)] for character in text[:-1])
+                 + self.digits[int(text[-1])].get_width())
+        score_text = pygame.Surface((width, self.digits[0].get_height()))
+        score_text.fill(self.color)
+        x = 0
+        for character in text:
+            digit = int(character)
+            score_text.blit(self.digits[digit], (x, 0))
+            x += self.digit_advances[digit]
+        return score_text
 
 
 # --- test ---
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""profiler.py: per frame stage timings with a live overlay and chrome trace export"""
+
+__author__ = "Travis Mann"
+__version__ = "1.0"
+__maintainer__ = "Travis Mann"
+__email__ = "tmann.eng@gmail.com"
+__status__ = "Production"
+
+
+# --- imports ---
+import bisect
+import json
+import time
+from array import array
+
+import pygame
+
+from src.assets import asset_manager
+
+
+# --- constants ---
+HISTOGRAM_EDGES = (10000, 30000, 100000, 300000, 1000000, 3000000, 10000000, 30000000)  # bucket bounds, ns
+HISTOGRAM_COLORS = ((0, 200, 0),) * 5 + ((220, 200, 0),) * 2 + ((220, 0, 0),) * 2  # over 1ms, then 10ms
+
+
+# --- classes ---
+class Profiler:
+    """
+    purpose: time game loop stages into a ring buffer
+    stages are timed by wrapping their methods only while enabled, so a disabled profiler costs nothing
+    """
+    def __init__(self,
+                 capacity: int = 65536,
+                 frame_capacity: int = 240):
+        # attr from params
+        self.capacity = capacity
+        self.frame_capacity = frame_capacity
+
+        # registered stages, stage id is the index
+        self.stage_names = ['frame']  # stage 0 is the whole frame
+        self.stage_methods = []  # (owner, method name, stage id)
+        self.originals = []  # (owner, method name, original, owner had its own attribute) while enabled
+
+        # ring buffer of samples, nanoseconds from perf_counter_ns
+        self.sample_stages = array('H', [0]) * capacity
+        self.sample_starts = array('q', [0]) * capacity
+        self.sample_ends = array('q', [0]) * capacity
+        self.sample_count = 0  # total recorded, next slot is sample_count % capacity
+
+        # ring buffer of recent frame times in milliseconds
+        self.frame_times = array('d', [0]) * frame_capacity
+        self.frame_count = 0
+        self.frame_start = None
+
+        # overlay
+        self.enabled = False
+        self.overlay_refresh = 30  # frames between recomputing overlay stats
+        self.stats = None  # (p50 frame ms, p99 frame ms, slowest stage name, its ms per frame, histograms)
+
+    def add_stage(self, owner,
+                  method_name: str,
+                  stage_name: str = None) -> None:
+        """
+        purpose: register a method to time while the profiler is enabled
+        :param owner: object or module the method is looked up on
+        :param stage_name: name shown in the overlay and trace, defaults to Owner.method
+        """
+        if stage_name is None:
+            stage_name = f'{type(owner).__name__}.{method_name}'
+        self.stage_names.append(stage_name)
+        stage_id = len(self.stage_names) - 1
+        self.stage_methods.append((owner, method_name, stage_id))
+
+        # objects built while profiling, e.g. on first use, are timed straight away
+        if self.enabled:
+            self.wrap_method(owner, method_name, stage_id)
+
+    def enable(self) -> None:
+        """
+        purpose: start timing every registered stage
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self.frame_start = None
+        for owner, method_name, stage_id in self.stage_methods:
+            self.wrap_method(owner, method_name, stage_id)
+
+    def wrap_method(self, owner,
+                    method_name: str,
+                    stage_id: int) -> None:
+        """
+        purpose: swap a method for a timed version, remembering the original for disable
+        """
+        had_attribute = method_name in getattr(owner, '__dict__', {})
+        original = getattr(owner, method_name)
+        self.originals.append((owner, method_name, original, had_attribute))
+        setattr(owner, method_name, self.wrap(original, stage_id))
+
+    def disable(self) -> None:
+        """
+        purpose: stop timing and put the original methods back
+        """
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, method_name, original, had_attribute in reversed(self.originals):
+            if had_attribute:
+                setattr(owner, method_name, original)
+            else:
+                delattr(owner, method_name)
+        self.originals = []
+
+    def toggle(self) -> None:
+        """
+        purpose: switch profiling and the overlay on or off
+        """
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def wrap(self, method, stage_id: int):
+        """
+        purpose: get a version of method that records how long each call takes
+        """
+        record = self.record
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(stage_id, start, perf_counter_ns())
+
+        return timed
+
+    def record(self, stage_id: int, start: int, end: int) -> None:
+        """
+        purpose: add a sample to the ring buffer, overwriting the oldest once full
+        """
+        idx = self.sample_count % self.capacity
+        self.sample_stages[idx] = stage_id
+        self.sample_starts[idx] = start
+        self.sample_ends[idx] = end
+        self.sample_count += 1
+
+    def end_frame(self) -> None:
+        """
+        purpose: close the current frame, call once per game loop while enabled
+        """
+        now = time.perf_counter_ns()
+        if self.frame_start is not None:
+            self.record(0, self.frame_start, now)
+            self.frame_times[self.frame_count % self.frame_capacity] = (now - self.frame_start) / 1e6
+            self.frame_count += 1
+            # stats are costly, only refresh them every few frames
+            if self.stats is None or self.frame_count % self.overlay_refresh == 0:
+                self.stats = self.get_stats()
+        self.frame_start = now
+
+    def get_samples(self) -> list:
+        """
+        purpose: get samples in the ring buffer, oldest first
+        :return samples: (stage id, start ns, end ns) tuples
+        """
+        count = min(self.sample_count, self.capacity)
+        first = self.sample_count - count
+        samples = []
+        for sample_idx in range(first, self.sample_count):
+            idx = sample_idx % self.capacity
+            samples.append((self.sample_stages[idx], self.sample_starts[idx], self.sample_ends[idx]))
+        return samples
+
+    def get_recent_frame_times(self) -> list:
+        """
+        purpose: get recent frame times in milliseconds, oldest first
+        """
+        count = min(self.frame_count, self.frame_capacity)
+        return [self.frame_times[frame_idx % self.frame_capacity]
+                for frame_idx in range(self.frame_count - count, self.frame_count)]
+
+    def get_stats(self) -> tuple:
+        """
+        purpose: summarize recent frames for the overlay
+        :return stats: (p50 frame ms, p99 frame ms, slowest stage name, its exclusive ms per frame,
+                        (stage name, sample count per HISTOGRAM_EDGES bucket) per stage with samples)
+        """
+        frame_times = sorted(self.get_recent_frame_times())
+        if not frame_times:
+            return 0, 0, None, 0, []
+
+        # exclusive time per stage, nested stages are subtracted from the stage that called them
+        samples = sorted(self.get_samples(), key=lambda sample: (sample[1], -sample[2]))
+        exclusive_times = [0] * len(self.stage_names)
+        stack = []  # (stage id, end) of stages containing the current sample
+        for stage_id, start, end in samples:
+            while stack and stack[-1][1] <= start:
+                stack.pop()
+            exclusive_times[stage_id] += end - start
+            if stack:
+                exclusive_times[stack[-1][0]] -= end - start
+            stack.append((stage_id, end))
+
+        # how long each stage takes, frame included, buckets are log spaced from 10us up to 30ms and over
+        histograms = [[0] * (len(HISTOGRAM_EDGES) + 1) for _ in self.stage_names]
+        for stage_id, start, end in samples:
+            histograms[stage_id][bisect.bisect_right(HISTOGRAM_EDGES, end - start)] += 1
+        histograms = [(self.stage_names[stage_id], counts) for stage_id, counts in enumerate(histograms)
+                      if any(counts)]
+
+        # frame itself is not a stage
+        frames_sampled = max(1, sum(1 for sample in samples if sample[0] == 0))
+        slowest_id = max(range(1, len(self.stage_names)), key=lambda stage_id: exclusive_times[stage_id],
+                         default=0)
+        return (frame_times[len(frame_times) // 2],
+                frame_times[min(len(frame_times) - 1, int(len(frame_times) * 0.99))],
+                self.stage_names[slowest_id] if slowest_id else None,
+                exclusive_times[slowest_id] / frames_sampled / 1e6,
+                histograms)
+
+    def draw_overlay(self, screen: pygame.Surface,
+                     rect: pygame.Rect) -> pygame.Rect:
+        """
+        purpose: draw frame time percentiles, the slowest stage and a time histogram per stage into rect
+        rows that don't fit in rect are left off
+        :return rect: screen rectangle drawn to
+        """
+        pygame.draw.rect(screen, (0, 0, 0), rect)
+        if self.stats is None:
+            return rect
+
+        # text summary, stats only change every overlay_refresh frames, the text cache renders each line once
+        p50, p99, slowest_name, slowest_time, histograms = self.stats
+        lines = (f'frame p50 {p50:.1f}ms  p99 {p99:.1f}ms',
+                 f'slowest {slowest_name} {slowest_time:.2f}ms',
+                 'stage times, 10us to 30ms')
+        for line_idx, line in enumerate(lines):
+            text = asset_manager.get_text(None, 16, line, (255, 255, 255))
+            screen.blit(text, (rect.left + 2, rect.top + 2 + line_idx * 14))
+
+        # one row per stage, bars show the share of its samples in each bucket
+        row_height = 12
+        bar_width = 12
+        bars_left = rect.right - bar_width * len(HISTOGRAM_COLORS) - 2
+        row_top = rect.top + 2 + len(lines) * 14
+        for stage_name, counts in histograms:
+            if row_top + row_height > rect.bottom:
+                break
+            text = asset_manager.get_text(None, 13, stage_name, (200, 200, 200))
+            screen.blit(text, (rect.left + 2, row_top), (0, 0, bars_left - rect.left - 4, row_height))
+            total = sum(counts)
+            for bucket_idx, count in enumerate(counts):
+                bar_height = (count * (row_height - 2) + total - 1) // total  # any sample shows
+                screen.fill(HISTOGRAM_COLORS[bucket_idx], (bars_left + bucket_idx * bar_width,
+                                                           row_top + row_height - 1 - bar_height,
+                                                           bar_width - 1, bar_height))
+            row_top += row_height
+
+        return rect
+
+    def export_chrome_trace(self, trace_fl: str) -> None:
+        """
+        purpose: write buffered samples as chrome trace event JSON, open with chrome://tracing or perfetto
+        """
+        events = [{'name': self.stage_names[stage_id],
+                   'ph': 'X',  # complete event
+                   'ts': start / 1000,
+                   'dur': (end - start) / 1000,
+                   'pid': 0,
+                   'tid': 0}
+                  for stage_id, start, end in self.get_samples()]
+        with open(trace_fl, 'w') as trace_file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
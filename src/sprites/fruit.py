@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-"""main.py: high level game logic"""
+"""fruit.py: pulsing fruit sprite for the snake to eat"""
 
 __author__ = "Travis Mann"
 __version__ = "1.0"
@@ -14,6 +14,8 @@ __status__ = "Production"
 import pygame
 from pygame.math import Vector2
 
+from src.assets import asset_manager
+
 
 # --- classes ---
 class Fruit(pygame.sprite.Sprite):
@@ -28,50 +30,75 @@ class Fruit(pygame.sprite.Sprite):
 
         # attr from params
         self.image_fl = image_fl
-        self.image = pygame.image.load(image_fl)
-        self.image = pygame.transform.scale(self.image, (side_length, side_length))  # scale image
+        self.image = asset_manager.get_image(image_fl, (side_length, side_length))  # scaled image
         self.rect = self.image.get_rect()  # rectangle around image for placing
         self.position = Vector2(0, 0)
         self.base_side_length = side_length
         self.side_length = side_length
 
         # animation sizes
-        self.grow_direction = 1  # positive or negative tto indicate growing vs shrinking
         self.max_size_ratio = 1.1
         self.min_size_ratio = 0.9
-        self.growing = True
+        self.frames = self.get_pulse_frames()
+        self.frame_idx = -1  # first pulse shows frame 0
 
-    def update(self, tile_length: int) -> None:
+    def update(self, tile_length: int,
+               view_x: int = 0,
+               view_y: int = 0) -> None:
         """
         purpose: update sprite
-        :param tile_offset: pixel offset of tiles top left corner
         :param tile_length: pixel length of a single tile
+        :param view_x, view_y: world pixel at the top left of a scrolling board
         """
         # position fruit
-        self.rect.center = [(self.position.x + 0.5) * tile_length,
-                            (self.position.y + 0.6) * tile_length]
+        self.rect.center = [(self.position.x + 0.5) * tile_length - view_x,
+                            (self.position.y + 0.6) * tile_length - view_y]
 
         # add pulsing animation
         self.pulse()
 
     def pulse(self) -> None:
         """
-        purpose: add pulsing animation to fruit, speed based on a parabola
+        purpose: add pulsing animation to fruit by stepping through the precomputed frames
         """
-        # get current growth ratio & grow rate
-        size_ratio = self.side_length / self.base_side_length
-        grow_rate = self.get_growth_rate_magnitude(size_ratio)
-
-        # swap grow direction if too small or too big
-        if size_ratio >= self.max_size_ratio or size_ratio <= self.min_size_ratio:
-            self.grow_direction = - self.grow_direction
+        self.frame_idx = (self.frame_idx + 1) % len(self.frames)
+        self.image = self.frames[self.frame_idx]
+        self.side_length = self.image.get_width()
 
-        # apply growth rate
-        self.side_length += grow_rate * self.grow_direction * self.base_side_length
+    def get_pulse_frames(self) -> list:
+        """
+        purpose: get one full pulse cycle of scaled images
+        scaled images live in the asset cache, so fruits of the same image and size share them and
+        asset_manager.clear() lets them go
+        """
+        return [asset_manager.get_image(self.image_fl, (side_length, side_length))
+                for side_length in self.get_pulse_side_lengths()]
 
-        # update image size
-        self.image = pygame.image.load(self.image_fl)
-        self.image = pygame.transform.scale(self.image, (self.side_length, self.side_length))  # scale image
+    def get_pulse_side_lengths(self) -> list:
+        """
+        purpose: simulate one grow/shrink cycle, speed based on a parabola
+        :return side_lengths: pixel side length for each frame
+        """
+        side_length = self.base_side_length
+        grow_direction = 1  # positive or negative to indicate growing vs shrinking
+        direction_swaps = 0
+        side_lengths = []
+        # run until back to base size after growing and shrinking once
+        while direction_swaps < 2 or side_length < self.base_side_length:
+            # get current growth ratio & grow rate
+            size_ratio = side_length / self.base_side_length
+            grow_rate = self.get_growth_rate_magnitude(size_ratio)
+
+            # swap grow direction if too small or too big
+            if size_ratio >= self.max_size_ratio or size_ratio <= self.min_size_ratio:
+                grow_direction = - grow_direction
+                direction_swaps += 1
+
+            # apply growth rate
+            side_length += grow_rate * grow_direction * self.base_side_length
+            side_lengths.append(int(side_length))
+
+        return side_lengths
 
     def get_growth_rate_magnitude(self, size_ratio):
         """
@@ -82,6 +109,3 @@ class Fruit(pygame.sprite.Sprite):
         # parabola equation
         magnitude = magnification_factor * (size_ratio - self.max_size_ratio)**2 + min_growth_rate
         return magnitude
-
-
-
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-"""main.py: high level game logic"""
+"""snake.py: draw the player controlled snake"""
 
 __author__ = "Travis Mann"
 __version__ = "1.0"
@@ -11,187 +11,226 @@ __status__ = "Production"
 
 
 # --- imports ---
-import pygame
 from pygame.math import Vector2
 
+from src.assets import asset_manager
+from src.engine.engine import SnakeEngine
+
 
 # --- classes ---
 class Snake:
     """
     purpose: player controlled snake object
     """
+    # unit vectors for direction indices used by the part lookups
+    DIRECTIONS = SnakeEngine.DIRECTIONS  # up, right, down, left
+
     def __init__(self, segment_size: int,
-                 segment_positions: list,
-                 starting_direction: Vector2):
-        self.segment_positions = segment_positions
+                 engine: SnakeEngine,
+                 image_dir: str = './img/snake1'):
+        self.engine = engine
         self.segment_size = segment_size
-        self.direction = starting_direction
-        self.next_direction = starting_direction  # direction to load on next move
-        self.grow = True  # used to queue growth on next move
+        self.image_dir = image_dir  # folder with head, body, l and tail images
+        self.next_direction = Vector2(engine.direction)  # direction to load on next move
 
-        # segment images
-        self.head = pygame.transform.scale(pygame.image.load('./img/snake1/head.png'),(segment_size, segment_size))
-        self.body = pygame.transform.scale(pygame.image.load('./img/snake1/body.png'), (segment_size, segment_size))
-        self.l = pygame.transform.scale(pygame.image.load('./img/snake1/l.png'), (segment_size, segment_size))
-        self.tail = pygame.transform.scale(pygame.image.load('./img/snake1/tail.png'), (segment_size, segment_size))
+        # direction lookups, cell id difference between neighbors -> direction index
+        tile_count = engine.tile_count
+        self.direction_indices = {direction: idx for idx, direction in enumerate(self.DIRECTIONS)}
+        self.delta_directions = {-tile_count: 0, 1: 1, tile_count: 2, -1: 3}
 
-        # track self collision
+        # rotate every part once so drawing is only blits
+        self.head_parts, self.tail_parts, self.body_parts = self.build_parts()
+
+        # drawing state copied from the engine
+        self.direction = Vector2(engine.direction)
         self.colliding = False
+        self.head_count = 0  # number of tiles the head has entered
+        self.cell_steps = {}  # cell -> head_count when the head entered it, used to find a cell's segment
+        self.sync()
 
-        # track smooth slithering
+        # track smooth slithering, fraction of a tile the head is drawn ahead of its tile
         self.offset = 0
-        self.offset_speed = 0.1
+        self.min_offset = -0.4  # offset right after a move
+        self.max_offset = 0.5  # offset when the next move is due
 
+        # world pixel drawn at the top left of the board surface, moved by a scrolling board
+        self.view_x = 0
+        self.view_y = 0
 
-    def draw(self, board) -> None:
+    def build_parts(self) -> tuple:
         """
-        purpose: draw snake on the screen
+        purpose: get each snake part in every orientation from the shared asset cache
+        :return head_parts: heads indexed by direction
+        :return tail_parts: tails indexed by direction to the next segment toward the head
+        :return body_parts: body and L pieces indexed by last_direction * 4 + next_direction
         """
-        # draw each segment
-        for idx, segment_position in enumerate(self.segment_positions):
-            x_position = int(segment_position.x * self.segment_size)
-            y_position = int(segment_position.y * self.segment_size)
-
-
-            # add smooth slither to head and tail
-            if idx == 0:  # head
-                x_position += self.direction.x * self.offset * self.segment_size
-                y_position += self.direction.y * self.offset * self.segment_size
-            elif idx == len(self.segment_positions) - 1:  # tail
-                last_segment_position = self.segment_positions[idx - 1] - self.segment_positions[idx]
-                x_position += last_segment_position.x * self.offset * self.segment_size
-                y_position += last_segment_position.y * self.offset * self.segment_size
-
-
-            # draw segment
-            segment = pygame.Rect(x_position, y_position, self.segment_size, self.segment_size)
-            part = self.get_part(idx)
-            board.blit(part, segment)
-
-            # telescope neck to connect stationary body to moving head
-            if idx == 1:
-                x_position += self.direction.x * self.offset * self.segment_size
-                y_position += self.direction.y * self.offset * self.segment_size
-                segment = pygame.Rect(x_position, y_position, self.segment_size, self.segment_size)
-                part = self.get_part(idx)
-                board.blit(part, segment)
-            # telescope tail to connect stationary body to moving tail
-            if idx == len(self.segment_positions) - 2:
-                x_position += self.direction.x * self.offset * self.segment_size
-                y_position += self.direction.y * self.offset * self.segment_size
-                segment = pygame.Rect(x_position, y_position, self.segment_size, self.segment_size)
-                part = self.get_part(idx)
-                board.blit(part, segment)
-
-
-    def move(self):
-        """
-        purpose: move snake between tiles
-        """
-
-        # check if movement between tiles is occuring
-        # accept new movement if near center of tile
-        if self.offset >= 0.3:
-            # reset offset
-            self.offset = -0.4
-
-            # check for and handle growth
-            if self.grow:  # copy all segments
-                new_segment_positions = self.segment_positions[:]
-                self.grow = False
-            else:  # copy all but last segment
-                new_segment_positions = self.segment_positions[:-1]
-
-            # insert new front segment based on current direction
-            self.direction = self.next_direction  # update current direction
-            new_segment_positions.insert(0, new_segment_positions[0] + self.direction)
-
-            # check for collision
-            if new_segment_positions[0] in self.segment_positions:
-                print(f'new segment positions: {new_segment_positions}')
-                self.colliding = True
-            else:
-                self.colliding = False
-
-            # update segment positions
-            self.segment_positions = new_segment_positions
-
-            # prep next move to be a slither
-            self.slither = True
-
-        else:
-            # increase offset by speed
-            self.offset += self.offset_speed
+        # rotation to turn an upward facing part toward each direction
+        rotations = (0, -90, 180, 90)
+        size = (self.segment_size, self.segment_size)
+        head_parts = [asset_manager.get_image(f'{self.image_dir}/head.png', size, rotation) for rotation in rotations]
+        tail_parts = [asset_manager.get_image(f'{self.image_dir}/tail.png', size, rotation) for rotation in rotations]
+        straight_parts = [asset_manager.get_image(f'{self.image_dir}/body.png', size, rotation)
+                          for rotation in rotations]
+
+        # L pieces depend only on the pair of directions, not their order
+        l_rotations = {frozenset((0, 1)): 90,  # up/right
+                       frozenset((1, 2)): 0,  # right/down
+                       frozenset((2, 3)): 270,  # down/left
+                       frozenset((3, 0)): 180}  # left/up
+        l_parts = {pair: asset_manager.get_image(f'{self.image_dir}/l.png', size, rotation)
+                   for pair, rotation in l_rotations.items()}
+
+        body_parts = []
+        for last_direction in range(4):
+            for next_direction in range(4):
+                pair = frozenset((last_direction, next_direction))
+                if pair in l_parts:  # L piece
+                    body_parts.append(l_parts[pair])
+                else:  # body piece
+                    body_parts.append(straight_parts[last_direction])
+
+        return head_parts, tail_parts, body_parts
+
+    @property
+    def segment_positions(self) -> list:
+        """
+        purpose: get tile position vectors of each segment, head first
+        """
+        return [Vector2(self.engine.get_position(cell)) for cell in self.engine.body]
 
-    def get_part(self, idx: int):
+    def sync(self) -> None:
         """
-        purpose: get proper image to draw for a given segment
-        :return part: image for snake part correctly rotated
+        purpose: copy snake state from the engine for drawing, e.g. after the engine is reset
         """
-        # get head
-        if idx == 0:
-            # rotate image
-            if self.direction.x == 1:  # rotate right
-                rotated_head = pygame.transform.rotate(self.head, -90)
-            elif self.direction.x == -1:  # rotate left
-                rotated_head = pygame.transform.rotate(self.head, 90)
-            elif self.direction.y == 1:  # rotate down
-                rotated_head = pygame.transform.rotate(self.head, 180)
-            else:  # vertical
-                rotated_head = self.head
+        body = self.engine.body
+        self.head_count = len(body)
+        self.cell_steps = {cell: self.head_count - idx for idx, cell in enumerate(body)}
+        self.direction = Vector2(self.engine.direction)
+        self.colliding = self.engine.loss_cause == 'collision'
 
-            return rotated_head
+    def get_slither(self) -> tuple:
+        """
+        purpose: get pixel shift of the head along its direction for smooth slithering
+        :return direction: direction index of the head
+        :return slither_x: x shift in pixels
+        :return slither_y: y shift in pixels
+        """
+        direction = self.direction_indices[self.engine.direction]
+        direction_x, direction_y = self.DIRECTIONS[direction]
+        return (direction,
+                direction_x * self.offset * self.segment_size,
+                direction_y * self.offset * self.segment_size)
 
-        # get body
+    def draw(self, board) -> None:
+        """
+        purpose: draw snake on the screen
+        """
+        slither = self.get_slither()
+
+        # walk the body keeping the segments either side of the current one
+        body = self.engine.body
+        tail_idx = len(body) - 1
+        cells = iter(body)
+        previous_cell = None
+        cell = next(cells)
+        for idx in range(tail_idx + 1):
+            next_cell = next(cells, None)
+            self.draw_segment(board, slither, idx, tail_idx, previous_cell, cell, next_cell)
+            previous_cell = cell
+            cell = next_cell
+
+    def draw_cells(self, board, cells) -> None:
+        """
+        purpose: draw only the segments on the given cells, for redrawing part of the board
+        """
+        slither = self.get_slither()
+        body = self.engine.body
+        tail_idx = len(body) - 1
+
+        # find segment index of each cell from when the head entered it
+        segment_indices = sorted(self.head_count - self.cell_steps[cell]
+                                 for cell in cells if cell in self.engine.occupied)
+        for idx in segment_indices:
+            previous_cell = body[idx - 1] if idx > 0 else None
+            next_cell = body[idx + 1] if idx < tail_idx else None
+            self.draw_segment(board, slither, idx, tail_idx, previous_cell, body[idx], next_cell)
+
+    def draw_segment(self, board,
+                     slither: tuple,
+                     idx: int,
+                     tail_idx: int,
+                     previous_cell,
+                     cell: int,
+                     next_cell) -> None:
+        """
+        purpose: draw a single segment given its neighbors
+        :param slither: head direction and pixel shift from get_slither
+        :param previous_cell: cell of the segment toward the head, None for the head
+        :param next_cell: cell of the segment toward the tail, None for the tail
+        """
+        direction, slither_x, slither_y = slither
+        segment_size = self.segment_size
+        row_idx, column_idx = divmod(cell, self.engine.tile_count)
+        x_position = column_idx * segment_size - self.view_x
+        y_position = row_idx * segment_size - self.view_y
+
+        # draw segment, adding smooth slither to head and tail
+        if idx == 0:  # head
+            part = self.head_parts[direction]
+            board.blit(part, (x_position + slither_x, y_position + slither_y))
         else:
-            # get direction of next segment from current segment
-            last_segment_position = self.segment_positions[idx - 1] - self.segment_positions[idx]
-
-            # swap body for tail if last piece
-            if idx == len(self.segment_positions) - 1:
-                return self.get_rotated_body(last_segment_position, self.tail)
-            else:
-                # check for L piece
-                next_segment_position = self.segment_positions[idx + 1] - self.segment_positions[idx]
-
-                # L piece for right/down
-                if (last_segment_position.y == -1 and next_segment_position.x == 1) or (
-                        last_segment_position.x == 1 and next_segment_position.y == -1):
-                    return pygame.transform.rotate(self.l, 90)
-                # L piece for right/up
-                elif (last_segment_position.x == 1 and next_segment_position.y == 1) or (
-                    last_segment_position.y == 1 and next_segment_position.x == 1):
-                    return pygame.transform.rotate(self.l, 0)
-                # L piece for left/up
-                elif (last_segment_position.y == 1 and next_segment_position.x == -1) or (
-                    last_segment_position.x == -1 and next_segment_position.y == 1):
-                    return pygame.transform.rotate(self.l, 270)
-                # L piece for left/down
-                elif (last_segment_position.y == -1 and next_segment_position.x == -1) or (
-                        last_segment_position.x == -1 and next_segment_position.y == -1):
-                    return pygame.transform.rotate(self.l, 180)
-
-                # body piece
-                else:
-                    return self.get_rotated_body(last_segment_position, self.body)
-
-    def get_rotated_body(self, last_segment_position, piece):
-        """
-        purpose: rotate body or tail image based on the last segment position
-        :param last_segment_position:
-        :param piece: tail or body piece
-        :return:
-        """
-        # rotate image to align with next segment
-        if last_segment_position.x == 1:  # rotate right
-            rotated_part = pygame.transform.rotate(piece, -90)
-        elif last_segment_position.x == -1:  # rotate left
-            rotated_part = pygame.transform.rotate(piece, 90)
-        elif last_segment_position.y == 1:  # rotate down
-            rotated_part = pygame.transform.rotate(piece, 180)
-        else:  # vertical
-            rotated_part = piece
-
-        # output
-        return rotated_part
-
+            last_direction = self.delta_directions[previous_cell - cell]
+            if next_cell is None:  # tail
+                part = self.tail_parts[last_direction]
+                last_x, last_y = self.DIRECTIONS[last_direction]
+                board.blit(part, (x_position + last_x * self.offset * segment_size,
+                                  y_position + last_y * self.offset * segment_size))
+            else:  # body or L piece
+                part = self.body_parts[last_direction * 4 + self.delta_directions[next_cell - cell]]
+                board.blit(part, (x_position, y_position))
+
+        # telescope neck to connect stationary body to moving head
+        if idx == 1:
+            x_position += slither_x
+            y_position += slither_y
+            board.blit(part, (x_position, y_position))
+        # telescope tail to connect stationary body to moving tail
+        if idx == tail_idx - 1:
+            x_position += slither_x
+            y_position += slither_y
+            board.blit(part, (x_position, y_position))
+
+    def get_dirty_cells(self, end_length: int = 3) -> set:
+        """
+        purpose: get cells whose drawing can change between frames, the ends of the snake and their neighbors
+        :param end_length: number of segments at each end that slither or change part
+        """
+        body = self.engine.body
+        tile_count = self.engine.tile_count
+        end_length = min(end_length, len(body))
+        cells = set()
+        for idx in range(end_length):
+            for cell in (body[idx], body[-1 - idx]):
+                cells.update((cell, cell - 1, cell + 1, cell - tile_count, cell + tile_count))
+        return cells
+
+    def move(self) -> int:
+        """
+        purpose: move snake to the next tile by stepping the engine
+        :return eaten: number of fruits eaten by the engine step
+        """
+        head = self.engine.head
+        eaten = self.engine.step((self.next_direction.x, self.next_direction.y))
+        if self.engine.head != head:  # head entered a new tile
+            self.head_count += 1
+            self.cell_steps[self.engine.head] = self.head_count
+        self.direction = Vector2(self.engine.direction)
+        self.colliding = self.engine.loss_cause == 'collision'
+        return eaten
+
+    def interpolate(self, progress: float) -> None:
+        """
+        purpose: set smooth slither offset for drawing between moves
+        :param progress: time since the last move as a fraction of the time between moves, 0 to 1
+        """
+        self.offset = self.min_offset + (self.max_offset - self.min_offset) * progress